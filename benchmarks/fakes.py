@@ -0,0 +1,170 @@
+"""
+네트워크 없이 벤치마크를 실행하기 위한 대역(stand-in) 모음
+yt-dlp, Discord 음성 클라이언트, 로컬 HTTP 미디어 서버를 흉내냅니다.
+"""
+
+import asyncio
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from typing import Optional, List
+
+
+class FakeYoutubeDL:
+    """
+    yt_dlp.YoutubeDL 대역
+    지정된 지연 시간 후 로컬 미디어 서버를 가리키는 정보 딕셔너리를 반환합니다.
+    """
+
+    media_url = "http://127.0.0.1:1/sample.webm"
+    latency = 0.05
+    duration = 3
+    calls = 0
+
+    def __init__(self, options=None):
+        self.options = options or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @classmethod
+    def _video(cls, video_id: str) -> dict:
+        expire = int(time.time()) + 6 * 3600
+        return {
+            'id': video_id,
+            'title': f"Benchmark Track {video_id}",
+            'url': f"{cls.media_url}?expire={expire}&id={video_id}",
+            'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+            'duration': cls.duration,
+            'acodec': 'opus',
+            'abr': 96,
+            'uploader': 'benchmark',
+        }
+
+    def extract_info(self, query: str, download: bool = False) -> dict:
+        type(self).calls += 1
+        time.sleep(self.latency)  # yt-dlp 추출 지연 흉내
+        if 'list=' in query:
+            count = int(query.rsplit('=', 1)[-1])
+            return {'entries': [
+                {'id': f"pl{i:09d}", 'url': f"pl{i:09d}", 'title': f"Playlist {i}", 'duration': self.duration}
+                for i in range(count)
+            ]}
+        if query.startswith('ytsearch1:'):
+            video_id = f"s{abs(hash(query)) % 10 ** 10:010d}"
+            return {'entries': [self._video(video_id)]}
+        return self._video(query.rsplit('=', 1)[-1][-11:])
+
+    def sanitize_info(self, data: dict) -> dict:
+        return data
+
+
+class FakeVoiceClient:
+    """
+    discord.VoiceClient 대역
+    play()가 호출되면 별도 스레드에서 소스의 패킷을 읽고, 첫 패킷 시각과 곡 전환 간격을 기록합니다.
+    """
+
+    def __init__(self, packets_per_track: int = 50):
+        self.packets_per_track = packets_per_track
+        self.play_calls: List[float] = []
+        self.first_packets: List[float] = []
+        self.track_ends: List[float] = []
+        self.first_packet_event = threading.Event()
+        self._playing = False
+
+    def is_connected(self) -> bool:
+        return True
+
+    def is_playing(self) -> bool:
+        return self._playing
+
+    def stop(self):
+        self._playing = False
+
+    def play(self, source, *, after=None):
+        self._playing = True
+        self.play_calls.append(time.perf_counter())
+        threading.Thread(target=self._run, args=(source, after), daemon=True).start()
+
+    def _run(self, source, after):
+        error = None
+        try:
+            for i in range(self.packets_per_track):
+                if not self._playing:
+                    break
+                packet = source.read()
+                if not packet:
+                    break
+                if i == 0:
+                    self.first_packets.append(time.perf_counter())
+                    self.first_packet_event.set()
+        except Exception as e:
+            error = e
+        finally:
+            source.cleanup()
+            self._playing = False
+            self.track_ends.append(time.perf_counter())
+            if after:
+                after(error)
+
+    def transition_gaps(self) -> List[float]:
+        """이전 곡 종료부터 다음 곡 첫 패킷까지의 간격 목록"""
+        return [start - end for end, start in zip(self.track_ends, self.first_packets[1:])]
+
+
+class FakeBot:
+    """MusicManager/QueueManager가 사용하는 최소한의 봇 대역"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.music_manager = None
+
+
+class LocalMediaServer:
+    """ffmpeg로 생성한 테스트 음원을 제공하는 로컬 HTTP 서버"""
+
+    def __init__(self, duration: int = 3):
+        self.duration = duration
+        self.directory = tempfile.mkdtemp(prefix="music_bench_")
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which('ffmpeg') is not None
+
+    def __enter__(self) -> "LocalMediaServer":
+        subprocess.run(
+            ['ffmpeg', '-nostdin', '-loglevel', 'error', '-y',
+             '-f', 'lavfi', '-i', f'sine=frequency=440:duration={self.duration}',
+             '-c:a', 'libopus', '-b:a', '96k', os.path.join(self.directory, 'sample.webm')],
+            check=True
+        )
+        handler = functools.partial(_QuietHandler, directory=self.directory)
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/sample.webm"
+
+    def __exit__(self, *exc):
+        if self._server:
+            self._server.shutdown()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return False
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
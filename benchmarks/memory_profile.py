@@ -0,0 +1,200 @@
+"""
+게이트웨이 프로필별 메모리 사용량 벤치마크
+가상의 GUILD_CREATE/MESSAGE_CREATE 데이터를 discord.py 캐시에 직접 넣고
+lean/full 프로필의 서버 1,000개당 상주 메모리(RSS) 증가량을 측정합니다.
+프로필마다 별도 프로세스에서 실행하므로 서로의 메모리 사용량이 섞이지 않습니다.
+
+사용법:
+    python benchmarks/memory_profile.py --guilds 5000 --output memory.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+from typing import Any, Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = ("lean", "full")
+_TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+def _rss_bytes() -> int:
+    """현재 프로세스의 상주 메모리 (Linux는 /proc, 그 외는 최대 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class _Ids:
+    """고유한 snowflake ID 발급"""
+
+    def __init__(self):
+        self._next = 100_000_000_000_000_000
+
+    def __call__(self) -> str:
+        self._next += 1
+        return str(self._next)
+
+
+def _user(user_id: str, index: int) -> dict:
+    return {
+        'id': user_id, 'username': f"user{index}", 'global_name': f"User {index}",
+        'discriminator': '0', 'avatar': None, 'bot': False,
+    }
+
+
+def _member(user: dict) -> dict:
+    return {'user': user, 'roles': [], 'joined_at': _TIMESTAMP, 'deaf': False, 'mute': False, 'flags': 0, 'nick': None}
+
+
+def make_guild(ids: _Ids, profile: str, members: int, voice_members: int, channels: int) -> dict:
+    """
+    프로필에 따라 게이트웨이가 보내는 것과 같은 모양의 GUILD_CREATE 데이터 생성
+    full은 멤버 청크 이후처럼 전체 멤버와 접속 상태를, lean은 음성 채널 참여자만 포함합니다.
+    """
+    guild_id = ids()
+    text_channels = [
+        {'id': ids(), 'type': 0, 'name': f"text-{i}", 'position': i, 'permission_overwrites': [],
+         'parent_id': None, 'nsfw': False, 'topic': None, 'rate_limit_per_user': 0}
+        for i in range(channels)
+    ]
+    voice_channel = {'id': ids(), 'type': 2, 'name': "voice", 'position': channels, 'permission_overwrites': [],
+                     'parent_id': None, 'bitrate': 64000, 'user_limit': 0, 'rtc_region': None}
+    users = [_user(ids(), i) for i in range(members)]
+    in_voice = users[:voice_members]
+    sent = users if profile == "full" else in_voice
+
+    data = {
+        'id': guild_id, 'name': f"guild {guild_id}", 'owner_id': users[0]['id'] if users else guild_id,
+        'member_count': members, 'large': members > 250, 'unavailable': False,
+        'roles': [{'id': guild_id, 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+                   'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0}],
+        'emojis': [], 'stickers': [], 'features': [], 'threads': [], 'stage_instances': [],
+        'guild_scheduled_events': [], 'soundboard_sounds': [],
+        'channels': text_channels + [voice_channel],
+        'members': [_member(user) for user in sent],
+        'voice_states': [
+            {'user_id': user['id'], 'channel_id': voice_channel['id'], 'session_id': user['id'],
+             'deaf': False, 'mute': False, 'self_deaf': False, 'self_mute': False,
+             'self_video': False, 'suppress': False, 'request_to_speak_timestamp': None}
+            for user in in_voice
+        ],
+        'presences': [],
+        'premium_tier': 0, 'afk_timeout': 300, 'verification_level': 0, 'default_message_notifications': 0,
+        'explicit_content_filter': 0, 'mfa_level': 0, 'nsfw_level': 0, 'preferred_locale': 'ko',
+        'system_channel_flags': 0,
+    }
+    if profile == "full":
+        data['presences'] = [
+            {'user': {'id': user['id']}, 'status': 'online', 'activities': [], 'client_status': {'desktop': 'online'}}
+            for user in users[: members // 3]
+        ]
+    return data
+
+
+def make_messages(ids: _Ids, guild: dict, count: int) -> Iterator[dict]:
+    """서버의 첫 텍스트 채널에 올라온 MESSAGE_CREATE 데이터"""
+    channel_id = guild['channels'][0]['id']
+    author = guild['members'][0]['user'] if guild['members'] else _user(ids(), 0)
+    for i in range(count):
+        yield {
+            'id': ids(), 'channel_id': channel_id, 'guild_id': guild['id'], 'author': author,
+            'member': {'roles': [], 'joined_at': _TIMESTAMP, 'deaf': False, 'mute': False, 'flags': 0},
+            'content': f"message {i}", 'timestamp': _TIMESTAMP, 'edited_timestamp': None, 'tts': False,
+            'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [],
+            'embeds': [], 'pinned': False, 'type': 0,
+        }
+
+
+async def measure_profile(profile: str, guilds: int, members: int, voice_members: int,
+                          channels: int, messages: int) -> Dict[str, Any]:
+    """한 프로필의 캐시를 채우고 RSS 증가량을 측정 (자식 프로세스에서 실행)"""
+    sys.path.insert(0, ROOT)
+    import discord
+    from bot import gateway_options
+
+    client = discord.Client(**gateway_options(profile))
+    state = client._connection
+    ids = _Ids()
+
+    gc.collect()
+    before = _rss_bytes()
+    last_guild = None
+    for _ in range(guilds):
+        last_guild = make_guild(ids, profile, members, voice_members, channels)
+        state._add_guild_from_data(last_guild)
+    # 메시지 이벤트는 guild_messages intent가 있을 때만 수신됨
+    if state._intents.guild_messages and last_guild is not None:
+        for data in make_messages(ids, last_guild, messages):
+            state.parse_message_create(data)
+    gc.collect()
+    after = _rss_bytes()
+
+    cached_members = sum(len(guild._members) for guild in state._guilds.values())
+    return {
+        'profile': profile,
+        'guilds': guilds,
+        'rss_before_mb': before / 1024 / 1024,
+        'rss_after_mb': after / 1024 / 1024,
+        'rss_per_1000_guilds_mb': (after - before) / 1024 / 1024 / guilds * 1000,
+        'cached_members': cached_members,
+        'cached_messages': len(state._messages) if state._messages is not None else 0,
+    }
+
+
+def run_profile(profile: str, args) -> Dict[str, Any]:
+    """프로필 측정을 새 프로세스에서 실행하고 결과를 반환"""
+    command = [
+        sys.executable, os.path.abspath(__file__), '--child', profile,
+        '--guilds', str(args.guilds), '--members', str(args.members),
+        '--voice-members', str(args.voice_members), '--channels', str(args.channels),
+        '--messages', str(args.messages),
+    ]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="게이트웨이 프로필별 메모리 사용량 벤치마크")
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일 (기본: 표준 출력)")
+    parser.add_argument('--guilds', type=int, default=5_000)
+    parser.add_argument('--members', type=int, default=100, help="서버당 멤버 수")
+    parser.add_argument('--voice-members', type=int, default=2, help="서버당 음성 채널 참여자 수")
+    parser.add_argument('--channels', type=int, default=10, help="서버당 텍스트 채널 수")
+    parser.add_argument('--messages', type=int, default=1_000, help="메시지 캐시에 넣을 메시지 수")
+    parser.add_argument('--child', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = asyncio.run(measure_profile(
+            args.child, args.guilds, args.members, args.voice_members, args.channels, args.messages
+        ))
+        print(json.dumps(result))
+        return
+
+    report = {
+        'params': {
+            'guilds': args.guilds, 'members': args.members, 'voice_members': args.voice_members,
+            'channels': args.channels, 'messages': args.messages,
+        },
+        'results': {profile: run_profile(profile, args) for profile in PROFILES},
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+오프라인 벤치마크 실행 스크립트
+네트워크 없이 재생 시작 지연, 곡 전환 간격, 대기열 연산 처리량, 플레이리스트 추가 속도를 측정합니다.
+
+사용법:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare old.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Awaitable, Dict, Any, List
+
+# 벤치마크는 디스크 캐시와 실제 yt-dlp 없이 실행
+os.environ.setdefault("TRACK_CACHE_PATH", ":memory:")
+os.environ.setdefault("AUDIO_CACHE_ENABLED", "false")
+os.environ.setdefault("EXTRACT_BACKEND", "thread")
+os.environ.setdefault("STREAM_REFRESH_INTERVAL", "3600")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeYoutubeDL, FakeVoiceClient, FakeBot, LocalMediaServer  # noqa: E402
+from config import Track  # noqa: E402
+from music_components import extractor as extractor_module  # noqa: E402
+from music_components.music_core import get_music_manager, IndexedQueue  # noqa: E402
+from music_components.music_player import YTDLSource, PlaylistResolver  # noqa: E402
+from music_components.queue_manager import QueueManager  # noqa: E402
+
+extractor_module.YoutubeDL = FakeYoutubeDL
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    """지연 시간 목록의 요약 통계 (초)"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+
+async def _timed(op: Callable[[int], Awaitable[Any]], count: int) -> Dict[str, Any]:
+    """op를 count번 실행하여 처리량과 오류 수를 측정"""
+    errors = 0
+    first_error = None
+    started = time.perf_counter()
+    for i in range(count):
+        try:
+            await op(i)
+        except Exception as e:
+            errors += 1
+            first_error = first_error or f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+    result = {'ops': count, 'seconds': elapsed, 'ops_per_sec': count / elapsed if elapsed else 0.0, 'errors': errors}
+    if first_error:
+        result['first_error'] = first_error
+    return result
+
+
+def _make_track(i: int) -> Track:
+    video_id = f"q{i:010d}"
+    return Track(
+        title=f"Queue Track {i}",
+        url='',
+        duration=180,
+        webpage_url=f"https://www.youtube.com/watch?v={video_id}",
+        video_id=video_id
+    )
+
+
+async def bench_queue_ops(bot: FakeBot, sizes: List[int], op_count: int) -> Dict[str, Any]:
+    """QueueManager의 추가/이동/삭제/셔플 처리량 (add_bulk/remove_bulk는 묶음 연산)"""
+    queue_manager = QueueManager(bot)
+    results = {}
+    rng = random.Random(0)
+    for size in sizes:
+        guild_id = 10_000 + size
+        state = queue_manager.music_manager.get_server_state(guild_id)
+        tracks = [_make_track(i) for i in range(size)]
+
+        add = await _timed(lambda i: queue_manager.add_track(guild_id, tracks[i]), size)
+        # 대기열 제한으로 추가되지 못한 곡은 나머지 측정을 위해 직접 채움
+        state.music_queue.extend(tracks[len(state.music_queue):])
+
+        move = await _timed(
+            lambda i: queue_manager.move_track(guild_id, rng.randrange(size), rng.randrange(size)),
+            op_count
+        )
+        shuffle = await _timed(lambda i: queue_manager.shuffle_queue(guild_id), max(1, op_count // 50))
+        remove = await _timed(
+            lambda i: queue_manager.remove_track(guild_id, rng.randrange(max(1, len(state.music_queue)))),
+            min(op_count, size)
+        )
+        remove_bulk = await _timed(
+            lambda i: queue_manager.remove_tracks(guild_id, rng.sample(range(len(state.music_queue)), 10)),
+            max(1, min(op_count, len(state.music_queue) // 10 - 1))
+        )
+        await state.clear_queue()
+
+        # 같은 곡 수를 add_tracks 한 번으로 추가
+        add_bulk = await _timed(lambda i: queue_manager.add_tracks(guild_id, tracks, allow_partial=True), 1)
+        add_bulk['tracks_per_sec'] = size / add_bulk['seconds'] if add_bulk['seconds'] else 0.0
+        results[str(size)] = {
+            'add': add, 'add_bulk': add_bulk, 'move': move, 'shuffle': shuffle,
+            'remove': remove, 'remove_bulk': remove_bulk,
+        }
+        await state.clear_queue()
+    return results
+
+
+def bench_queue_structure(sizes: List[int], op_count: int) -> Dict[str, Any]:
+    """IndexedQueue와 list의 위치 기반 연산 비교 (대기열 크기별 초당 연산 수)"""
+    def measure(factory, size: int) -> Dict[str, float]:
+        rng = random.Random(size)
+        queue = factory(_make_track(i) for i in range(size))
+        positions = [(rng.randrange(size), rng.randrange(size)) for _ in range(op_count)]
+        result = {}
+
+        started = time.perf_counter()
+        for a, _ in positions:
+            queue.insert(a, queue.pop(a))
+        result['insert_remove'] = op_count / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for a, b in positions:
+            queue.insert(b, queue.pop(a))
+        result['move'] = op_count / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(op_count):
+            queue.append(queue.pop(0))
+        result['pop_head'] = op_count / (time.perf_counter() - started)
+        return result
+
+    return {
+        str(size): {'indexed_queue': measure(IndexedQueue, size), 'list': measure(list, size)}
+        for size in sizes
+    }
+
+
+async def bench_playlist_fill(bot: FakeBot, entries: int, workers: int) -> Dict[str, Any]:
+    """플레이리스트 항목을 대기열에 채우는 속도 (즉시 추출 / 지연 추출)"""
+    results = {}
+    for run, lazy in enumerate((False, True)):
+        playlist = [
+            {'id': f"p{run}{i:09d}", 'url': f"p{run}{i:09d}", 'title': f"Playlist {i}", 'duration': 180}
+            for i in range(entries)
+        ]
+        added = []
+
+        async def on_tracks(tracks):
+            added.extend(tracks)
+            return len(tracks)
+
+        calls_before = FakeYoutubeDL.calls
+        resolver = PlaylistResolver(bot.loop, workers, lazy=lazy)
+        result = await resolver.resolve(playlist, on_tracks)
+        results['lazy' if lazy else 'eager'] = {
+            'entries': entries,
+            'workers': workers,
+            'added': result.added_count,
+            'seconds': result.elapsed,
+            'tracks_per_sec': result.throughput,
+            'extract_calls': FakeYoutubeDL.calls - calls_before,
+        }
+    return results
+
+
+async def _wait_for(predicate: Callable[[], bool], timeout: float):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("벤치마크 대기 시간 초과")
+        await asyncio.sleep(0.005)
+
+
+async def bench_first_audio(bot: FakeBot, runs: int) -> Dict[str, Any]:
+    """/재생 처리 시작부터 첫 오디오 패킷까지의 지연 (캐시 미스 / 캐시 적중)"""
+    manager = get_music_manager(bot)
+    samples = {'cold': [], 'cached': []}
+    for run in range(runs):
+        for kind in ('cold', 'cached'):
+            guild_id = 20_000 + run * 2 + (kind == 'cached')
+            voice_client = FakeVoiceClient(packets_per_track=1)
+            started = time.perf_counter()
+            track = await YTDLSource.create_source(f"benchmark song {run}", loop=bot.loop)
+            await manager.get_server_state(guild_id).add_track(track)
+            await manager.play_next_song(voice_client, guild_id)
+            await _wait_for(lambda: voice_client.first_packets, timeout=30)
+            samples[kind].append(voice_client.first_packets[0] - started)
+            await _wait_for(lambda: not voice_client.is_playing(), timeout=30)
+    return {kind: _summary(values) for kind, values in samples.items()}
+
+
+async def bench_transitions(bot: FakeBot, tracks: int) -> Dict[str, Any]:
+    """곡 종료부터 다음 곡 첫 패킷까지의 무음 간격"""
+    manager = get_music_manager(bot)
+    guild_id = 30_000
+    state = manager.get_server_state(guild_id)
+    voice_client = FakeVoiceClient(packets_per_track=10_000)
+    for i in range(tracks):
+        await state.add_track(await YTDLSource.create_source(f"transition song {i}", loop=bot.loop))
+    await manager.play_next_song(voice_client, guild_id)
+    await _wait_for(lambda: len(voice_client.track_ends) >= tracks, timeout=60 * tracks)
+    return _summary(voice_client.transition_gaps())
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+async def run(args) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    bot = FakeBot(loop)
+    FakeYoutubeDL.latency = args.extract_latency
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'extract_latency': args.extract_latency,
+        },
+        'results': {},
+    }
+    results = report['results']
+    results['queue_ops'] = await bench_queue_ops(bot, args.queue_sizes, args.queue_ops)
+    results['queue_structure'] = bench_queue_structure(args.queue_sizes + [100_000], args.queue_ops)
+    results['playlist_fill'] = await bench_playlist_fill(bot, args.playlist_size, args.workers)
+
+    if LocalMediaServer.available():
+        with LocalMediaServer(duration=args.track_seconds) as server:
+            FakeYoutubeDL.media_url = server.url
+            FakeYoutubeDL.duration = args.track_seconds
+            results['first_audio'] = await bench_first_audio(bot, args.runs)
+            results['transitions'] = await bench_transitions(bot, args.transition_tracks)
+    else:
+        skipped = {'skipped': 'ffmpeg를 찾을 수 없음'}
+        results['first_audio'] = skipped
+        results['transitions'] = skipped
+    return report
+
+
+def _flatten(data: Any, prefix: str = '') -> Dict[str, float]:
+    """비교를 위해 중첩된 결과를 'a.b.c' 형태의 숫자 값으로 펼침"""
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix] = float(data)
+    return flat
+
+
+def compare(old_path: str, new_path: str):
+    """두 결과 파일의 수치를 비교하여 출력"""
+    with open(old_path, encoding='utf-8') as f:
+        old = _flatten(json.load(f)['results'])
+    with open(new_path, encoding='utf-8') as f:
+        new = _flatten(json.load(f)['results'])
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{key:60s} {before:14.4f} -> {after:14.4f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음악 봇 오프라인 벤치마크")
+    parser.add_argument('--output', help="결과를 저장할 JSON 파일 (기본: 표준 출력)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="두 결과 파일 비교")
+    parser.add_argument('--queue-sizes', type=int, nargs='+', default=[1_000, 10_000])
+    parser.add_argument('--queue-ops', type=int, default=1_000)
+    parser.add_argument('--playlist-size', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--extract-latency', type=float, default=0.05)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--transition-tracks', type=int, default=5)
+    parser.add_argument('--track-seconds', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
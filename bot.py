@@ -1,19 +1,72 @@
+import time
+
+# 시작 시간 측정 기준 (무거운 import 이전)
+_PROCESS_STARTED = time.monotonic()
+
 import discord
 from discord.ext import commands
 import os
+import hashlib
+import json
 from config import settings
-import asyncio
 import logging
 from music_components import get_music_manager, get_queue_manager, MusicPlayer
+from music_components.metrics import get_metrics
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class MusicBot(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.all()
-        super().__init__(command_prefix=settings.default_prefix, intents=intents, help_command=None)
+# 불러올 확장 목록 (의존 순서대로)
+EXTENSIONS = (
+    "music_components.tracing",
+    "music_components.metrics",
+    "music_components.track_cache",
+    "music_components.suggestions",
+    "music_components.state_store",
+    "music_components.audio_cache",
+    "music_components.extractor",
+    "music_components.music_core",
+    "music_components.idle_monitor",
+    "music_components.queue_manager",
+    "music_components.music_player",
+)
+
+def gateway_options(profile: str) -> dict:
+    """
+    게이트웨이 프로필별 Client 옵션
+    lean: 이 봇은 메시지를 처리하지 않고 서버/음성 상태/상호작용 이벤트만 사용하므로
+    guilds, voice_states intent만 요청하고, 음성 채널 참여자만 멤버 캐시에 두며 메시지 캐시를 끕니다.
+    """
+    if profile == "full":
+        return {'intents': discord.Intents.all()}
+    if profile != "lean":
+        raise ValueError(f"알 수 없는 게이트웨이 프로필: {profile}")
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.voice_states = True
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.voice = True
+    return {
+        'intents': intents,
+        'member_cache_flags': member_cache_flags,
+        'max_messages': None,
+        'chunk_guilds_at_startup': False,
+    }
+
+class MusicBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None):
+        super().__init__(
+            command_prefix=settings.default_prefix,
+            help_command=None,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            **gateway_options(settings.gateway_profile)
+        )
+        # 시작 단계별 소요 시간 (초): setup_hook 완료, 첫 on_ready
+        self.startup_timings = {}
+        self._commands_synced = False
 
     async def on_message(self, message):
         """메시지 이벤트를 처리하지 않음으로써 접두사 명령어 비활성화"""
@@ -30,47 +83,66 @@ class MusicBot(commands.Bot):
         self.queue_manager = get_queue_manager(self)
         
         # 컴포넌트 로딩
-        for filename in os.listdir("./music_components"):
-            if filename.endswith(".py") and not filename.startswith("__"):
-                try:
-                    await self.load_extension(f"music_components.{filename[:-3]}")
-                    logger.info(f"Loaded extension: {filename}")
-                except Exception as e:
-                    logger.error(f"Failed to load extension {filename}: {e}")
-        
-        # 음성 채널 상태 체크를 위한 이벤트 리스너 추가
-        # on_voice_state_update는 async def로 정의되어 자동으로 등록됨
+        for extension in EXTENSIONS:
+            try:
+                await self.load_extension(extension)
+                logger.info(f"Loaded extension: {extension}")
+            except Exception as e:
+                logger.error(f"Failed to load extension {extension}: {e}")
+
+        # 봇 음성 상태 로깅 (빈 채널 퇴장은 music_components.idle_monitor가 처리)
         self.add_listener(self.on_voice_state_update_bot, 'on_voice_state_update')
-        
-    async def on_voice_state_update(self, member, before, after):
-        """음성 채널 상태가 변경될 때 호출되는 이벤트 핸들러"""
-        if member.id == self.user.id:  # 봇 자신의 상태 변경은 무시
+
+        self.record_startup("setup_hook")
+        get_metrics().gauge(
+            "music_startup_seconds",
+            "프로세스 시작부터 각 시작 단계 완료까지 걸린 시간 (phase: setup_hook, ready)",
+            lambda: (({'phase': phase}, seconds) for phase, seconds in self.startup_timings.items())
+        )
+
+    def record_startup(self, phase: str):
+        """프로세스 시작부터 현재까지의 시간을 시작 단계 소요 시간으로 기록 (단계별 최초 1회)"""
+        if phase not in self.startup_timings:
+            self.startup_timings[phase] = time.monotonic() - _PROCESS_STARTED
+            logger.info(f"Startup phase '{phase}' reached in {self.startup_timings[phase]:.2f}s")
+
+    def command_tree_hash(self) -> str:
+        """등록된 슬래시 명령어 정의의 해시"""
+        payload = []
+        for command in self.tree.get_commands():
+            try:
+                payload.append(command.to_dict(self.tree))
+            except TypeError:
+                payload.append(command.to_dict())  # discord.py 2.3 이하
+        payload.sort(key=lambda item: item.get('name', ''))
+        data = json.dumps({'application_id': self.application_id, 'commands': payload}, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    async def sync_commands(self):
+        """
+        명령어 정의가 마지막 동기화 이후 바뀐 경우에만 전역 동기화
+        (재연결마다 호출되는 on_ready에서 반복 동기화하지 않음, 클러스터에서는 샤드 0 담당 프로세스만)
+        """
+        if self._commands_synced or (self.shard_ids and 0 not in self.shard_ids):
             return
-            
-        guild_id = member.guild.id
-        voice_client = member.guild.voice_client
-        
-        if voice_client and voice_client.channel:
-            # 봇이 음성 채널에 연결되어 있는 경우
-            # 봇이 있는 채널의 멤버 수 계산 (봇 제외)
-            channel_members = len([m for m in voice_client.channel.members if not m.bot])
-            
-            if channel_members == 0:
-                # 잠시 대기 후 다시 확인
-                await asyncio.sleep(10)
-                
-                # 대기 후 다시 확인
-                channel_members = len([m for m in voice_client.channel.members if not m.bot])
-                if channel_members == 0:
-                    if voice_client.is_playing():
-                        voice_client.stop()
-                    await voice_client.disconnect()
-                    
-                    # 메시지 전송 및 상태 초기화
-                    text_channel = member.guild.text_channels[0]
-                    await text_channel.send("👋 음성 채널에 아무도 없어서 나갔습니다.")
-                    state = self.music_manager.get_server_state(guild_id)
-                    await state.clear_queue()
+
+        digest = self.command_tree_hash()
+        path = settings.command_sync_hash_path
+        try:
+            with open(path, encoding='utf-8') as f:
+                if f.read().strip() == digest:
+                    self._commands_synced = True
+                    logger.info("Command tree unchanged, skipping sync")
+                    return
+        except FileNotFoundError:
+            pass
+
+        await self.tree.sync()
+        self._commands_synced = True
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(digest)
+        logger.info("Global commands synchronized successfully")
 
     async def on_voice_state_update_bot(self, member, before, after):
         """봇의 음성 상태 변경을 모니터링"""
@@ -81,16 +153,19 @@ class MusicBot(commands.Bot):
             else:
                 logger.info(f"봇이 음성 채널에 입장: {after.channel.name}")
 
-def main():
-    """봇을 실행하는 메인 함수"""
-    bot = MusicBot()
+def main(shard_ids=None, shard_count=None):
+    """
+    봇을 실행하는 메인 함수
+    shard_ids를 지정하면 해당 샤드만 연결합니다 (cluster.py에서 프로세스별로 사용).
+    """
+    bot = MusicBot(shard_ids=shard_ids, shard_count=shard_count)
     
     @bot.event
     async def on_ready():
-        logger.info(f'Bot is ready: {bot.user.name} (ID: {bot.user.id})')
+        logger.info(f'Bot is ready: {bot.user.name} (ID: {bot.user.id}, shards: {bot.shard_ids or "auto"}/{bot.shard_count})')
+        bot.record_startup("ready")
         try:
-            await bot.tree.sync()
-            logger.info("Global commands synchronized successfully")
+            await bot.sync_commands()
         except Exception as e:
             logger.error(f"Failed to sync commands: {e}")
     
@@ -0,0 +1,159 @@
+"""
+여러 프로세스에서 샤드를 나누어 실행하는 클러스터 실행 스크립트
+프로세스마다 AutoShardedBot이 샤드 일부를 담당하므로, 이벤트 루프와 음성 패킷 전송이
+하나의 GIL을 공유하지 않고 모든 CPU 코어를 사용할 수 있습니다.
+
+사용법:
+    python cluster.py                          # CLUSTER_PROCESSES개 프로세스, 샤드 수는 Discord 권장값
+    python cluster.py --processes 4 --shards 16
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import Dict, List, Optional
+import aiohttp
+from config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+
+
+def fetch_recommended_shards(token: str) -> int:
+    """Discord가 권장하는 샤드 수를 조회"""
+    async def fetch() -> int:
+        headers = {'Authorization': f"Bot {token}"}
+        async with aiohttp.ClientSession() as session:
+            async with session.get(GATEWAY_BOT_URL, headers=headers) as response:
+                response.raise_for_status()
+                data = await response.json()
+                return int(data['shards'])
+    return asyncio.run(fetch())
+
+
+def split_shards(shard_count: int, processes: int) -> List[List[int]]:
+    """샤드 ID를 프로세스 수만큼 연속된 구간으로 나눔 (빈 구간은 제외)"""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    groups, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(list(range(start, end)))
+        start = end
+    return [group for group in groups if group]
+
+
+def _suffix_path(path: str, cluster_id: int) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{cluster_id}{ext}"
+
+
+def configure_worker(cluster_id: int):
+    """
+    클러스터 프로세스별로 겹치면 안 되는 설정을 조정
+    트랙 메타데이터 캐시(SQLite WAL)와 서버 상태 저장소는 여러 프로세스가 같은 파일을 함께 사용할 수 있습니다.
+    공유 캐시가 잠겨 있으면 기다리지 않고 캐시 미스로 처리합니다.
+    """
+    settings.metrics_port += cluster_id
+    settings.trace_dump_path = _suffix_path(settings.trace_dump_path, cluster_id)
+    # 오디오 캐시 용량 관리는 프로세스 메모리의 인덱스 기준이므로 디렉터리를 분리
+    settings.audio_cache_dir = os.path.join(settings.audio_cache_dir, f"cluster-{cluster_id}")
+    if settings.cluster_shared_cache:
+        # 다른 프로세스가 쓰는 동안 루프가 최대 수 초간 멈추지 않도록 잠금 대기를 짧게 제한
+        settings.track_cache_busy_timeout = settings.cluster_cache_busy_timeout
+    elif settings.track_cache_path != ':memory:':
+        settings.track_cache_path = _suffix_path(settings.track_cache_path, cluster_id)
+
+
+def run_worker(cluster_id: int, shard_ids: List[int], shard_count: int):
+    """클러스터 프로세스 진입점: 담당 샤드만 연결하는 봇을 실행"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"[cluster {cluster_id}] %(levelname)s:%(name)s:%(message)s",
+        force=True
+    )
+    configure_worker(cluster_id)
+    # 종료 신호를 KeyboardInterrupt로 받아 봇이 정상 종료(상태 저장 포함)되도록 함
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    import bot
+    bot.main(shard_ids=shard_ids, shard_count=shard_count)
+
+
+class ClusterLauncher:
+    """클러스터 프로세스를 실행하고, 비정상 종료된 프로세스는 지연 후 다시 실행"""
+
+    def __init__(self, shard_count: int, processes: int):
+        self.shard_count = shard_count
+        self.groups = split_shards(shard_count, processes)
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._restarts: Dict[int, int] = {}
+        self._stopping = False
+
+    def _spawn(self, cluster_id: int):
+        process = self._context.Process(
+            target=run_worker,
+            args=(cluster_id, self.groups[cluster_id], self.shard_count),
+            name=f"music-cluster-{cluster_id}",
+            daemon=False
+        )
+        process.start()
+        self._processes[cluster_id] = process
+        logger.info(f"클러스터 {cluster_id} 시작 (PID {process.pid}, 샤드 {self.groups[cluster_id]})")
+
+    def stop(self, *_):
+        """모든 클러스터 프로세스에 종료 신호를 보냄"""
+        self._stopping = True
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    def run(self):
+        """클러스터를 실행하고 모든 프로세스가 종료될 때까지 감시"""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        logger.info(f"샤드 {self.shard_count}개를 프로세스 {len(self.groups)}개로 실행합니다.")
+        for cluster_id in range(len(self.groups)):
+            self._spawn(cluster_id)
+            # Discord의 동시 IDENTIFY 제한을 넘지 않도록 순차적으로 시작
+            time.sleep(settings.cluster_start_delay)
+
+        restart_at: Dict[int, float] = {}
+        while self._processes:
+            time.sleep(1)
+            for cluster_id, process in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                if self._stopping or process.exitcode == 0:
+                    del self._processes[cluster_id]
+                    continue
+                if cluster_id not in restart_at:
+                    restarts = self._restarts.get(cluster_id, 0)
+                    delay = min(60, 2 ** restarts)
+                    restart_at[cluster_id] = time.monotonic() + delay
+                    logger.error(f"클러스터 {cluster_id} 비정상 종료 (코드 {process.exitcode}), {delay}초 후 재시작")
+                elif time.monotonic() >= restart_at[cluster_id]:
+                    del restart_at[cluster_id]
+                    self._restarts[cluster_id] = self._restarts.get(cluster_id, 0) + 1
+                    self._spawn(cluster_id)
+        logger.info("모든 클러스터가 종료되었습니다.")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="음악 봇 멀티 프로세스 클러스터 실행")
+    parser.add_argument('--processes', type=int, default=settings.cluster_processes, help="실행할 프로세스 수")
+    parser.add_argument('--shards', type=int, default=settings.shard_count, help="전체 샤드 수 (0: Discord 권장값)")
+    args = parser.parse_args(argv)
+
+    shard_count = args.shards or fetch_recommended_shards(settings.bot_token)
+    ClusterLauncher(shard_count, args.processes).run()
+
+
+if __name__ == "__main__":
+    main()
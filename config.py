@@ -4,6 +4,7 @@
 """
 
 import os
+import sys
 import logging
 from dataclasses import dataclass
 from typing import Optional, Any, Dict
@@ -14,7 +15,10 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Python 3.10 이상에서는 __slots__를 사용해 트랙마다 __dict__를 만들지 않음
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class Track:
     """음악 트랙 정보를 담는 데이터 클래스"""
     title: str
@@ -23,6 +27,10 @@ class Track:
     webpage_url: str
     thumbnail_url: Optional[str] = None
     author: Optional[str] = None
+    video_id: Optional[str] = None
+    expires_at: Optional[float] = None  # 스트리밍 URL 만료 시각 (UNIX 시간)
+    codec: Optional[str] = None  # yt-dlp가 보고한 오디오 코덱 (예: opus)
+    bitrate: Optional[int] = None  # 오디오 비트레이트 (kbps)
     source: Optional[Any] = None  # FFmpeg 소스 저장용 필드
 
 class Settings:
@@ -41,6 +49,99 @@ class Settings:
         """설정 초기화"""
         self.bot_token = os.getenv("DISCORD_BOT_TOKEN")
         self.default_prefix = os.getenv("BOT_PREFIX", "!")
+
+        # yt-dlp 추출 backend: "thread" 또는 "process" (프로세스 풀, GIL 경합 회피)
+        self.extract_backend = os.getenv("EXTRACT_BACKEND", "thread").lower()
+        self.extract_workers = int(os.getenv("EXTRACT_WORKERS", "4"))
+
+        # 재생 경로 추적: 링 버퍼 크기, DEBUG 로그로 내보낼 이벤트 비율, SIGUSR1 덤프 파일
+        self.trace_buffer_size = int(os.getenv("TRACE_BUFFER_SIZE", "10000"))
+        self.trace_sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+        self.trace_dump_path = os.getenv("TRACE_DUMP_PATH", "./trace_dump.log")
+
+        # 게이트웨이 프로필: "lean"(필요한 intent만, 음성 참여자만 멤버 캐시, 메시지 캐시 없음) 또는 "full"(모든 intent)
+        self.gateway_profile = os.getenv("GATEWAY_PROFILE", "lean").lower()
+
+        # 슬래시 명령어 정의 해시 저장 위치 (바뀐 경우에만 전역 동기화)
+        self.command_sync_hash_path = os.getenv("COMMAND_SYNC_HASH_PATH", "./.cache/command_tree.sha256")
+
+        # 샤드/클러스터 설정 (cluster.py): 전체 샤드 수(0이면 Discord 권장값), 프로세스 수
+        self.shard_count = int(os.getenv("SHARD_COUNT", "0"))
+        self.cluster_processes = int(os.getenv("CLUSTER_PROCESSES", str(os.cpu_count() or 1)))
+        self.cluster_start_delay = float(os.getenv("CLUSTER_START_DELAY", "5"))
+        # 모든 클러스터 프로세스가 트랙 메타데이터 캐시 파일을 공유할지 여부
+        self.cluster_shared_cache = os.getenv("CLUSTER_SHARED_CACHE", "true").lower() == "true"
+        # 캐시 파일 공유 시 잠금 대기 시간(초): 넘으면 캐시 미스/저장 생략으로 처리해 이벤트 루프를 막지 않음
+        self.cluster_cache_busy_timeout = float(os.getenv("CLUSTER_CACHE_BUSY_TIMEOUT", "0.05"))
+
+        # Prometheus 형식 메트릭 HTTP 서버
+        self.metrics_enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+        self.metrics_host = os.getenv("METRICS_HOST", "127.0.0.1")
+        self.metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+
+        # 트랙 메타데이터 영구 캐시 설정
+        self.track_cache_path = os.getenv("TRACK_CACHE_PATH", "./.cache/tracks.sqlite3")
+        self.track_cache_max_entries = int(os.getenv("TRACK_CACHE_MAX_ENTRIES", "5000"))
+        self.track_cache_ttl = int(os.getenv("TRACK_CACHE_TTL", "18000"))  # 스트리밍 URL 만료(약 6시간) 이전
+        self.track_cache_busy_timeout = float(os.getenv("TRACK_CACHE_BUSY_TIMEOUT", "5"))  # SQLite 잠금 대기 시간(초)
+        # /재생 자동 완성: 최근 곡 제목/검색어 색인 크기 (전체, 서버별) 및 색인을 유지할 최대 서버 수
+        self.autocomplete_global_entries = int(os.getenv("AUTOCOMPLETE_GLOBAL_ENTRIES", "5000"))
+        self.autocomplete_guild_entries = int(os.getenv("AUTOCOMPLETE_GUILD_ENTRIES", "200"))
+        self.autocomplete_max_guilds = int(os.getenv("AUTOCOMPLETE_MAX_GUILDS", "1000"))
+
+        # 스트리밍 URL 만료 전 갱신 설정
+        self.stream_refresh_margin = int(os.getenv("STREAM_REFRESH_MARGIN", "600"))
+        self.stream_refresh_interval = int(os.getenv("STREAM_REFRESH_INTERVAL", "60"))
+        self.stream_refresh_lookahead = int(os.getenv("STREAM_REFRESH_LOOKAHEAD", "3"))
+
+        # 곡 재생 시작 실패 시 재시도: 곡당 재시도 횟수, 첫 대기 시간(초, 매번 2배), 최대 대기 시간(초)
+        self.player_track_retries = int(os.getenv("PLAYER_TRACK_RETRIES", "2"))
+        self.player_retry_delay = float(os.getenv("PLAYER_RETRY_DELAY", "1.0"))
+        self.player_retry_max_delay = float(os.getenv("PLAYER_RETRY_MAX_DELAY", "8.0"))
+        # /재생 응답 전에 첫 오디오 전송을 기다리는 최대 시간(초), 넘으면 준비 중으로 안내
+        self.play_start_timeout = float(os.getenv("PLAY_START_TIMEOUT", "15"))
+
+        # 서버별 대기열 최대 곡 수
+        self.max_queue_size = int(os.getenv("MAX_QUEUE_SIZE", "10000"))
+
+        # 유휴 서버 상태 정리: 재생/음성 연결 없이 TTL(초) 동안 사용되지 않은 서버 상태를 메모리에서 제거
+        self.state_idle_ttl = int(os.getenv("STATE_IDLE_TTL", "1800"))
+        self.state_sweep_interval = int(os.getenv("STATE_SWEEP_INTERVAL", "300"))
+        # 음성 채널에 봇만 남았을 때 나가기까지 기다리는 시간(초)과 유휴 타이머 휠의 tick 간격(초)
+        self.voice_idle_timeout = float(os.getenv("VOICE_IDLE_TIMEOUT", "10"))
+        self.idle_timer_tick = float(os.getenv("IDLE_TIMER_TICK", "1.0"))
+        # 서버 상태 영구 저장 (기본 비활성화): 대기열 변경 저널 + 주기적 스냅샷
+        # 재시작 시 대기열을 복원하고 재생 중이던 곡을 이어서 재생하며, 유휴 정리된 서버도 다음 사용 시 복원
+        self.state_store_enabled = os.getenv("STATE_STORE_ENABLED", "false").lower() == "true"
+        self.state_store_path = os.getenv("STATE_STORE_PATH", "./.cache/states.sqlite3")
+        self.state_journal_flush_interval = float(os.getenv("STATE_JOURNAL_FLUSH_INTERVAL", "1.0"))
+        self.state_checkpoint_interval = int(os.getenv("STATE_CHECKPOINT_INTERVAL", "30"))  # 재생 위치 기록 주기
+        self.state_snapshot_ops = int(os.getenv("STATE_SNAPSHOT_OPS", "500"))  # 저널이 이만큼 쌓이면 스냅샷으로 압축
+        self.state_resume_concurrency = int(os.getenv("STATE_RESUME_CONCURRENCY", "5"))
+
+        # 플레이리스트 병렬 추출 워커 수
+        self.playlist_resolve_workers = int(os.getenv("PLAYLIST_RESOLVE_WORKERS", "4"))
+
+        # 지연 추출 설정: 대기열에는 가벼운 항목만 넣고 재생 위치 앞 N곡만 미리 추출
+        self.lazy_track_resolve = os.getenv("LAZY_TRACK_RESOLVE", "true").lower() == "true"
+        self.prefetch_ahead = int(os.getenv("PREFETCH_AHEAD", "2"))
+
+        # 곡 전환 무음 최소화: 현재 곡 종료 N초 전에 다음 곡 FFmpeg 소스를 미리 생성
+        self.prewarm_enabled = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+        self.prewarm_lead = float(os.getenv("PREWARM_LEAD", "15"))
+
+        # 원본이 이미 Opus이면 재인코딩 없이 그대로 전달 (ffprobe도 생략)
+        self.opus_passthrough = os.getenv("OPUS_PASSTHROUGH", "true").lower() == "true"
+        self.opus_bitrate = int(os.getenv("OPUS_BITRATE", "96"))
+
+        # 인기 곡 로컬 오디오 캐시 (기본 비활성화)
+        self.audio_cache_enabled = os.getenv("AUDIO_CACHE_ENABLED", "false").lower() == "true"
+        self.audio_cache_dir = os.getenv("AUDIO_CACHE_DIR", "./.cache/audio")
+        self.audio_cache_max_bytes = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048")) * 1024 * 1024
+        self.audio_cache_min_plays = int(os.getenv("AUDIO_CACHE_MIN_PLAYS", "3"))
+        self.audio_cache_download_workers = int(os.getenv("AUDIO_CACHE_DOWNLOAD_WORKERS", "2"))
+        # 재생 횟수를 기록할 최근 재생 곡 수 (오래 재생되지 않은 곡부터 기록 삭제)
+        self.audio_cache_play_history = int(os.getenv("AUDIO_CACHE_PLAY_HISTORY", "5000"))
         
         if not self.bot_token:
             logger.warning("DISCORD_BOT_TOKEN이 환경 변수에 설정되지 않았습니다.")
@@ -83,5 +184,18 @@ class Settings:
             'options': '-vn -ar 48000 -ac 2 -f opus -b:a 96k -bufsize 2048k'  # 버퍼 크기 최적화
         }
 
+    @property
+    def ffmpeg_local_options(self) -> Dict[str, Any]:
+        """로컬 캐시 파일(Opus)을 재생할 때의 FFmpeg 옵션"""
+        return {'options': '-vn'}
+
+    @property
+    def ffmpeg_passthrough_options(self) -> Dict[str, Any]:
+        """Opus 원본을 재인코딩 없이 remux할 때의 FFmpeg 옵션"""
+        return {
+            'before_options': self.ffmpeg_options['before_options'],
+            'options': '-vn'  # 코덱/비트레이트는 FFmpegOpusAudio(codec='copy')가 지정
+        }
+
 # 전역 설정 인스턴스
 settings = Settings()
@@ -0,0 +1,181 @@
+"""
+자주 재생되는 곡의 오디오를 로컬 디스크에 저장하는 캐시 모듈
+바이트 용량 제한과 LRU 제거를 지원하며, 캐시된 곡은 네트워크 대신 로컬 파일로 재생합니다.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional, Set
+from config import Track, settings
+from .track_cache import track_key
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCache:
+    """
+    Opus 오디오 파일 캐시
+    min_plays번 이상 재생된 곡만 백그라운드에서 저장합니다.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, min_plays: int, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_plays = min_plays
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # 파일명 -> 크기 (LRU 순서)
+        self._play_counts: "OrderedDict[str, int]" = OrderedDict()  # 파일명 -> 재생 횟수 (최근 재생 순서)
+        self._downloading = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._download_semaphore = asyncio.Semaphore(settings.audio_cache_download_workers)
+
+        if enabled:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    def _load_index(self):
+        """디스크에 남아있는 파일로 인덱스를 복원 (최근 사용 순서는 수정 시각 기준)"""
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.part'):
+                os.remove(path)  # 중단된 다운로드
+                continue
+            if name.endswith('.opus'):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._evict()
+        logger.info(f"오디오 캐시 로드 완료: {len(self._entries)}곡, {self.total_bytes / 1024 / 1024:.1f}MB")
+
+    @staticmethod
+    def _filename(track: Track) -> str:
+        key = track_key(track)
+        if not track.video_id:
+            key = hashlib.sha1(key.encode()).hexdigest()
+        return f"{key}.opus"
+
+    def lookup(self, track: Track) -> Optional[str]:
+        """캐시된 파일 경로를 반환 (없으면 None)"""
+        if not self.enabled:
+            return None
+        name = self._filename(track)
+        if name not in self._entries:
+            self.misses += 1
+            return None
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            self.total_bytes -= self._entries.pop(name)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(name)
+        os.utime(path)  # 재시작 후에도 LRU 순서를 유지
+        self.hits += 1
+        return path
+
+    def record_play(self, track: Track):
+        """재생 횟수를 기록하고 인기 곡이면 백그라운드 저장을 시작"""
+        if not self.enabled or not track.url or not track.duration:
+            return
+        name = self._filename(track)
+        count = self._play_counts.get(name, 0) + 1
+        self._play_counts[name] = count
+        self._play_counts.move_to_end(name)
+        if len(self._play_counts) > settings.audio_cache_play_history:
+            # 재생 횟수 기록도 무한히 커지지 않도록 가장 오래 재생되지 않은 곡부터 제거
+            self._play_counts.popitem(last=False)
+
+        if count >= self.min_plays and name not in self._entries and name not in self._downloading:
+            self._downloading.add(name)
+            task = asyncio.get_event_loop().create_task(self._download(track, name))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def close(self):
+        """진행 중인 백그라운드 저장을 취소 (임시 파일은 각 작업이 정리)"""
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _download(self, track: Track, name: str):
+        """ffmpeg로 스트림을 Opus 파일로 저장 (원본이 Opus면 재인코딩 없이 복사)"""
+        path = os.path.join(self.directory, name)
+        temp_path = f"{path}.part"
+        codec_args = ['-c:a', 'copy'] if track.codec == 'opus' else ['-c:a', 'libopus', '-b:a', f'{settings.opus_bitrate}k']
+        process = None
+        try:
+            async with self._download_semaphore:
+                process = await asyncio.create_subprocess_exec(
+                    'ffmpeg', '-nostdin', '-loglevel', 'error', '-y',
+                    '-i', track.url, '-vn', *codec_args, '-f', 'opus', temp_path,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                _, stderr = await process.communicate()
+            if process.returncode != 0:
+                logger.error(f"오디오 캐시 저장 실패: {track.title} ({stderr.decode(errors='ignore').strip()})")
+                return
+
+            size = os.path.getsize(temp_path)
+            if size > self.max_bytes:
+                return
+            os.replace(temp_path, path)
+            self._entries[name] = size
+            self.total_bytes += size
+            self._evict()
+            logger.info(f"오디오 캐시 저장 완료: {track.title} ({size / 1024 / 1024:.1f}MB)")
+        except asyncio.CancelledError:
+            if process is not None and process.returncode is None:
+                process.kill()
+            raise
+        except Exception as e:
+            logger.error(f"오디오 캐시 저장 중 오류: {track.title} ({e})")
+        finally:
+            self._downloading.discard(name)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _evict(self):
+        """용량 제한을 넘으면 가장 오래 사용되지 않은 파일부터 제거"""
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+audio_cache = None
+
+def get_audio_cache() -> AudioCache:
+    """AudioCache 인스턴스를 가져오거나 생성"""
+    global audio_cache
+    if audio_cache is None:
+        audio_cache = AudioCache(
+            settings.audio_cache_dir,
+            settings.audio_cache_max_bytes,
+            settings.audio_cache_min_plays,
+            enabled=settings.audio_cache_enabled
+        )
+    return audio_cache
+
+async def setup(bot):
+    """봇에 오디오 캐시를 연결합니다."""
+    bot.audio_cache = get_audio_cache()
+
+async def teardown(bot):
+    """확장 해제 시 진행 중인 오디오 캐시 저장을 취소합니다."""
+    get_audio_cache().close()
@@ -0,0 +1,319 @@
+"""
+yt-dlp 정보 추출을 담당하는 모듈
+음원 정보 추출, Track 생성, 만료된 스트리밍 URL 갱신 기능을 제공합니다.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlparse, parse_qs
+from config import Track, settings
+from .track_cache import get_track_cache, track_key, extract_video_id, is_playlist_url, normalize_query
+from .metrics import get_metrics
+from .tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+_EXPIRE_PATH_PATTERN = re.compile(r'/expire/(\d+)')
+
+# 워커(스레드/프로세스)마다 옵션별 YoutubeDL 인스턴스를 재사용
+_worker_local = threading.local()
+
+# yt-dlp는 import에만 수백 ms가 걸리므로 첫 추출 시점에 불러옴 (벤치마크는 대역 클래스로 교체)
+YoutubeDL = None
+
+
+def _youtube_dl_class():
+    """yt_dlp.YoutubeDL 클래스를 처음 사용할 때 import"""
+    global YoutubeDL
+    if YoutubeDL is None:
+        from yt_dlp import YoutubeDL as youtube_dl
+        YoutubeDL = youtube_dl
+    return YoutubeDL
+
+
+def parse_stream_expiry(url: str) -> Optional[float]:
+    """서명된 스트리밍 URL의 expire= 값을 UNIX 시간으로 반환"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    expire = parse_qs(parsed.query).get('expire', [None])[0]
+    if expire is None:
+        # HLS 매니페스트 등은 경로에 /expire/<ts>/ 형태로 포함됨
+        match = _EXPIRE_PATH_PATTERN.search(parsed.path)
+        expire = match.group(1) if match else None
+    try:
+        return float(expire) if expire is not None else None
+    except ValueError:
+        return None
+
+
+def stream_needs_refresh(track: Track, margin: Optional[float] = None) -> bool:
+    """스트리밍 URL이 만료되었거나 margin 초 이내에 만료되는지 확인"""
+    if not track.url:
+        return True
+    if track.expires_at is None:
+        return False
+    if margin is None:
+        margin = settings.stream_refresh_margin
+    return track.expires_at - time.time() <= margin
+
+
+def _worker_extract(query: str, options: Dict[str, Any], submitted_at: float,
+                    sanitize: bool) -> Tuple[Optional[dict], str, float, float]:
+    """
+    워커에서 실행되는 추출 함수
+    (결과, 워커 이름, 대기 시간, 추출 시간)을 반환합니다.
+    """
+    started = time.time()
+    instances = getattr(_worker_local, 'instances', None)
+    if instances is None:
+        instances = _worker_local.instances = {}
+
+    key = json.dumps(options, sort_keys=True, default=str)
+    ydl = instances.get(key)
+    if ydl is None:
+        ydl = instances[key] = _youtube_dl_class()(options)
+
+    data = ydl.extract_info(query, download=False)
+    if data is not None and sanitize:
+        # 프로세스 간 전달을 위해 직렬화 가능한 형태로 변환
+        data = ydl.sanitize_info(data)
+    worker = f"{os.getpid()}:{threading.current_thread().name}"
+    return data, worker, started - submitted_at, time.time() - started
+
+
+class ExtractorStats:
+    """추출 요청 수 통계 (대기 시간과 워커별 지연 시간은 메트릭 히스토그램으로 기록)"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.coalesced = 0  # 진행 중인 동일 요청에 합류한 횟수
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+    def record(self, worker: str, wait: float, latency: float):
+        """완료된 추출의 executor 대기 시간과 워커별 추출 시간을 기록"""
+        self.completed += 1
+        metrics = get_metrics()
+        metrics.histogram(
+            "music_extractor_wait_seconds",
+            "추출 요청이 executor 대기열에서 워커에 배정되기까지 기다린 시간"
+        ).observe(wait)
+        metrics.histogram(
+            "music_extractor_latency_seconds",
+            "워커별 yt-dlp 추출 소요 시간 (worker: 프로세스 ID:스레드 이름)"
+        ).observe(latency, worker=worker)
+
+
+class Extractor:
+    """
+    yt-dlp 호출을 한 곳에서 관리하는 클래스
+    backend가 "process"이면 프로세스 풀에서 추출하여 이벤트 루프의 GIL 경합을 피합니다.
+    """
+
+    def __init__(self, backend: str = "thread", workers: int = 4):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"알 수 없는 추출 backend: {backend}")
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.stats = ExtractorStats()
+        self._executor: Optional[Executor] = None
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def _get_executor(self) -> Executor:
+        """첫 추출 시점에 executor를 생성"""
+        if self._executor is None:
+            if self.backend == "process":
+                # 이벤트 루프 스레드를 fork하지 않도록 spawn 사용
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="ytdl_worker"
+                )
+            logger.info(f"추출 executor 생성: {self.backend} (워커 {self.workers}개)")
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """워커를 기다리고 있는 추출 요청 수"""
+        return max(0, self.stats.in_flight - self.workers)
+
+    @staticmethod
+    def _flight_key(query: str, options: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        같은 영상/검색어와 같은 옵션이면 같은 키
+        플레이리스트 URL은 같은 영상으로 시작해도 목록이 다르므로 전체 URL로 구분합니다 (목록 ID는 대소문자 구분).
+        """
+        if is_playlist_url(query):
+            return query.strip(), json.dumps(options, sort_keys=True, default=str)
+        target = extract_video_id(query) or normalize_query(query)
+        return target, json.dumps(options, sort_keys=True, default=str)
+
+    async def extract_info(self, query: str, *, loop=None,
+                           options: Optional[Dict[str, Any]] = None) -> dict:
+        """
+        URL 또는 검색어의 정보를 executor에서 추출
+        동일한 요청이 이미 진행 중이면 새로 추출하지 않고 그 결과를 함께 기다립니다.
+        """
+        loop = loop or asyncio.get_event_loop()
+        options = options or settings.ytdl_options
+        key = self._flight_key(query, options)
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = loop.create_task(self._extract(query, options, loop))
+            self._inflight[key] = future
+
+            def _forget(done, key=key):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            future.add_done_callback(_forget)
+        else:
+            self.stats.coalesced += 1
+            logger.debug(f"진행 중인 추출에 합류: {query}")
+
+        # 한 요청자가 취소되어도 공유 중인 추출은 계속 진행
+        return await asyncio.shield(future)
+
+    async def _extract(self, query: str, options: Dict[str, Any], loop) -> dict:
+        """executor에 실제 추출 작업을 제출"""
+        self.stats.submitted += 1
+        try:
+            data, worker, wait, latency = await loop.run_in_executor(
+                self._get_executor(),
+                _worker_extract,
+                query,
+                options,
+                time.time(),
+                self.backend == "process"
+            )
+        except Exception:
+            self.stats.failed += 1
+            raise
+        self.stats.record(worker, wait, latency)
+        get_metrics().observe_stage("extract", wait + latency)
+        return data
+
+    def close(self):
+        """executor를 종료"""
+        if self._executor is not None:
+            if sys.version_info >= (3, 9):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                # Python 3.8에는 cancel_futures가 없으므로 대기 중인 추출은 실행된 뒤 종료됨
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @staticmethod
+    def create_track(data: dict) -> Track:
+        """데이터 딕셔너리에서 Track 객체 생성"""
+        url = data.get('url', '')
+        return Track(
+            title=data.get('title', 'Unknown'),
+            url=url,
+            duration=int(data.get('duration') or 0),
+            webpage_url=data.get('webpage_url', ''),
+            thumbnail_url=data.get('thumbnail', None),
+            author=data.get('uploader', None),
+            video_id=data.get('id', None),
+            expires_at=parse_stream_expiry(url),
+            codec=data.get('acodec') if data.get('acodec') not in (None, 'none') else None,
+            bitrate=int(data['abr']) if data.get('abr') else None
+        )
+
+    @staticmethod
+    def create_unresolved_track(entry: dict) -> Optional[Track]:
+        """flat 플레이리스트 항목으로 스트리밍 URL이 없는 가벼운 Track 생성"""
+        url = entry.get('url')
+        if not url:
+            return None
+        if not url.startswith('http'):
+            url = f"https://www.youtube.com/watch?v={url}"
+        thumbnails = entry.get('thumbnails') or [{}]
+        return Track(
+            title=entry.get('title') or 'Unknown',
+            url='',
+            duration=int(entry.get('duration') or 0),
+            webpage_url=url,
+            thumbnail_url=thumbnails[-1].get('url'),
+            author=entry.get('uploader') or entry.get('channel'),
+            video_id=entry.get('id')
+        )
+
+    @staticmethod
+    def _apply(track: Track, resolved: Track):
+        """추출된 정보로 기존 Track 객체를 갱신 (대기열의 같은 객체를 유지)"""
+        track.title = resolved.title
+        track.url = resolved.url
+        track.duration = resolved.duration or track.duration
+        track.webpage_url = resolved.webpage_url or track.webpage_url
+        track.thumbnail_url = resolved.thumbnail_url or track.thumbnail_url
+        track.author = resolved.author or track.author
+        track.video_id = resolved.video_id or track.video_id
+        track.expires_at = resolved.expires_at
+        track.codec = resolved.codec
+        track.bitrate = resolved.bitrate
+        if track.source:
+            # 이전 URL로 만든 소스는 더 이상 사용할 수 없음
+            track.source.cleanup()
+            track.source = None
+
+    async def resolve_track(self, track: Track, *, loop=None) -> bool:
+        """지연 추출 트랙을 캐시 또는 yt-dlp로 채우고, 만료 임박한 URL은 갱신"""
+        if not track.url:
+            cached = get_track_cache().get_by_key(track_key(track))
+            if cached and cached.url and not stream_needs_refresh(cached):
+                self._apply(track, cached)
+                return True
+        return await self.refresh_stream(track, loop=loop)
+
+    async def refresh_stream(self, track: Track, *, loop=None) -> bool:
+        """트랙의 스트리밍 URL을 다시 추출하여 갱신"""
+        if not track.webpage_url:
+            return False
+        try:
+            data = await self.extract_info(track.webpage_url, loop=loop)
+        except Exception as e:
+            logger.error(f"스트리밍 URL 갱신 실패: {track.title} ({e})")
+            return False
+        if not data or not data.get('url'):
+            return False
+
+        self._apply(track, self.create_track(data))
+        get_track_cache().put(None, track)
+        get_tracer().event(None, "extract.refreshed", title=track.title)
+        return True
+
+extractor = None
+
+def get_extractor() -> Extractor:
+    """Extractor 인스턴스를 가져오거나 생성"""
+    global extractor
+    if extractor is None:
+        extractor = Extractor(settings.extract_backend, settings.extract_workers)
+    return extractor
+
+async def setup(bot):
+    """봇에 추출기를 연결합니다."""
+    bot.extractor = get_extractor()
+
+async def teardown(bot):
+    """확장 해제 시 추출 워커를 종료합니다."""
+    get_extractor().close()
@@ -0,0 +1,210 @@
+"""
+음성 채널 유휴 감시 모듈
+봇이 있는 음성 채널의 (봇 제외) 인원 수를 음성 상태 이벤트마다 증감으로 관리하고,
+인원이 0명이 되면 서버별 유휴 타이머를 하나의 타이머 휠에 등록합니다.
+누군가 다시 들어오면 타이머를 취소하고, 만료되면 재생을 멈추고 채널에서 나갑니다.
+"""
+
+import asyncio
+import logging
+import math
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+from config import settings
+from .music_core import get_music_manager
+from .tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+
+class TimerWheel:
+    """
+    해시 타이머 휠
+    모든 타이머를 작업 하나가 tick 간격으로 처리하며, 등록/취소는 O(1)입니다.
+    slots * tick보다 긴 지연은 남은 바퀴 수(rounds)로 표현합니다.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self._slots: List[Dict[Hashable, list]] = [{} for _ in range(slots)]
+        self._timers: Dict[Hashable, int] = {}  # 키 -> 슬롯 번호
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+        self._callback_tasks: Set[asyncio.Task] = set()  # 실행 중인 코루틴 콜백 (GC 방지, 종료 시 취소)
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], Any]):
+        """delay초 후 callback을 실행 (같은 키의 기존 타이머는 대체, 코루틴 함수면 작업으로 실행)"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % len(self._slots)
+        self._slots[slot][key] = [(ticks - 1) // len(self._slots), callback]
+        self._timers[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        """타이머를 취소하고 취소 여부를 반환"""
+        slot = self._timers.pop(key, None)
+        if slot is None:
+            return False
+        self._slots[slot].pop(key, None)
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """tick 작업을 시작"""
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    def stop(self):
+        """tick 작업과 실행 중인 콜백 작업을 취소"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._callback_tasks):
+            task.cancel()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            # 처리 지연이 누적되지 않도록 절대 시각 기준으로 대기
+            next_tick += self.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            self.advance()
+
+    def advance(self):
+        """휠을 한 칸 돌리고 만료된 타이머의 콜백을 실행"""
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        bucket = self._slots[self._cursor]
+        expired = []
+        for key, entry in list(bucket.items()):
+            if entry[0] > 0:
+                entry[0] -= 1
+                continue
+            del bucket[key]
+            del self._timers[key]
+            expired.append(entry[1])
+
+        for callback in expired:
+            try:
+                result = callback()
+                if asyncio.iscoroutine(result):
+                    task = asyncio.get_running_loop().create_task(result)
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._callback_done)
+            except Exception as e:
+                logger.error(f"타이머 콜백 실행 중 오류: {e}")
+
+    def _callback_done(self, task: asyncio.Task):
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"타이머 콜백 실행 중 오류: {task.exception()}")
+
+
+class IdleMonitor:
+    """서버별 음성 채널 인원 수를 증분 관리하고, 비어 있으면 유휴 타이머로 퇴장을 예약"""
+
+    def __init__(self, bot, wheel: TimerWheel, timeout: float):
+        self.bot = bot
+        self.wheel = wheel
+        self.timeout = timeout
+        self._channels: Dict[int, int] = {}  # 서버 -> 봇이 있는 음성 채널 ID
+        self._occupancy: Dict[int, int] = {}  # 서버 -> 해당 채널의 (봇 제외) 인원 수
+
+    def occupancy(self, guild_id: int) -> Optional[int]:
+        """봇이 있는 음성 채널의 인원 수 (봇이 음성 채널에 없으면 None)"""
+        return self._occupancy.get(guild_id)
+
+    async def on_voice_state_update(self, member, before, after):
+        """음성 상태 변경 시 인원 수를 증감하고 유휴 타이머를 갱신"""
+        guild = member.guild
+        if member.id == self.bot.user.id:
+            self._bot_moved(guild.id, after.channel)
+            return
+
+        channel_id = self._channels.get(guild.id)
+        if channel_id is None or member.bot:
+            return
+        was_in = before.channel is not None and before.channel.id == channel_id
+        is_in = after.channel is not None and after.channel.id == channel_id
+        if was_in == is_in:
+            return
+        self._occupancy[guild.id] = max(0, self._occupancy.get(guild.id, 0) + (1 if is_in else -1))
+        self._update_timer(guild.id)
+
+    def _bot_moved(self, guild_id: int, channel):
+        """봇이 음성 채널에 들어가거나 옮기거나 나갔을 때 (이때만 채널 인원을 다시 셈)"""
+        if channel is None:
+            self._channels.pop(guild_id, None)
+            self._occupancy.pop(guild_id, None)
+            self.wheel.cancel(guild_id)
+            return
+        self._channels[guild_id] = channel.id
+        self._occupancy[guild_id] = sum(1 for m in channel.members if not m.bot)
+        self._update_timer(guild_id)
+
+    def _update_timer(self, guild_id: int):
+        if self._occupancy.get(guild_id):
+            if self.wheel.cancel(guild_id):
+                get_tracer().event(guild_id, "idle.cancelled")
+        elif guild_id not in self.wheel:
+            self.wheel.schedule(guild_id, self.timeout, lambda: self._leave_if_idle(guild_id))
+            get_tracer().event(guild_id, "idle.scheduled", timeout=self.timeout)
+
+    async def _leave_if_idle(self, guild_id: int):
+        """유휴 타이머 만료: 여전히 비어 있으면 재생을 멈추고 채널에서 나감"""
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        if voice_client is None or voice_client.channel is None:
+            self._bot_moved(guild_id, None)
+            return
+        # 이벤트를 놓쳤을 경우를 대비해 퇴장 직전에 한 번 확인
+        listeners = sum(1 for m in voice_client.channel.members if not m.bot)
+        if listeners:
+            self._occupancy[guild_id] = listeners
+            return
+
+        try:
+            if voice_client.is_playing():
+                voice_client.stop()
+            await voice_client.disconnect()
+
+            state = get_music_manager(self.bot).get_server_state(guild_id)
+            text_channel = state.text_channel or (guild.text_channels[0] if guild.text_channels else None)
+            if text_channel:
+                await text_channel.send("👋 음성 채널에 아무도 없어서 나갔습니다.")
+            await state.clear_queue()
+            state.mark_stopped()
+            get_tracer().event(guild_id, "idle.left")
+        except Exception as e:
+            logger.error(f"유휴 음성 채널 퇴장 중 오류: {e}")
+        finally:
+            self._bot_moved(guild_id, None)
+
+idle_monitor = None
+
+def get_idle_monitor(bot) -> IdleMonitor:
+    """IdleMonitor 인스턴스를 가져오거나 생성"""
+    global idle_monitor
+    if idle_monitor is None:
+        idle_monitor = IdleMonitor(
+            bot,
+            TimerWheel(tick=settings.idle_timer_tick),
+            settings.voice_idle_timeout
+        )
+    return idle_monitor
+
+async def setup(bot):
+    """음성 상태 이벤트 리스너를 등록하고 타이머 휠을 시작합니다."""
+    monitor = get_idle_monitor(bot)
+    monitor.wheel.start(bot.loop)
+    bot.add_listener(monitor.on_voice_state_update, 'on_voice_state_update')
+
+async def teardown(bot):
+    """리스너를 해제하고 타이머 휠을 멈춥니다."""
+    monitor = get_idle_monitor(bot)
+    bot.remove_listener(monitor.on_voice_state_update, 'on_voice_state_update')
+    monitor.wheel.stop()
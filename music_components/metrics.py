@@ -0,0 +1,207 @@
+"""
+재생 단계별 지연 시간과 상태를 수집하는 메트릭 모듈
+Prometheus 텍스트 형식으로 로컬 HTTP 포트에서 제공합니다.
+"""
+
+import bisect
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from aiohttp import web
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 재생 단계 지연 시간용 기본 버킷 (초)
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    """라벨별 누적 버킷 히스토그램"""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[Tuple[str, str], ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            # [버킷별 개수, 합계, 전체 개수]
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """수집 시점에 콜백으로 값을 읽는 gauge/counter"""
+
+    def __init__(self, name: str, help_text: str, kind: str,
+                 callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            for labels, value in self.callback():
+                lines.append(f"{self.name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+        except Exception as e:
+            logger.error(f"메트릭 수집 실패 ({self.name}): {e}")
+        return lines
+
+
+class MetricsRegistry:
+    """메트릭을 등록하고 Prometheus 텍스트 형식으로 출력"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self.stage_latency = self.histogram(
+            "music_stage_duration_seconds",
+            "재생 단계별 소요 시간 (stage: extract, source_create, first_audio, transition_gap)"
+        )
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Histogram(name, help_text, buckets)
+        return metric
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self._metrics[name] = CallbackMetric(name, help_text, "gauge", callback)
+
+    def counter(self, name: str, help_text: str, callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self._metrics[name] = CallbackMetric(name, help_text, "counter", callback)
+
+    def observe_stage(self, stage: str, seconds: float):
+        """재생 단계의 소요 시간을 기록"""
+        self.stage_latency.observe(seconds, stage=stage)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """/metrics 경로로 메트릭을 제공하는 aiohttp 서버"""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"메트릭 서버 시작: http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+metrics = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """전역 MetricsRegistry를 반환"""
+    return metrics
+
+def _register_collectors(bot):
+    """봇 컴포넌트의 상태를 읽는 gauge/counter 등록"""
+    # 각 컴포넌트가 이 모듈을 import하므로 순환 import를 피해 함수 안에서 가져옴
+    from .music_core import get_music_manager
+    from .extractor import get_extractor
+    from .track_cache import get_track_cache
+    from .audio_cache import get_audio_cache
+
+    music_manager = get_music_manager(bot)
+
+    def active_guilds():
+        states = music_manager.server_states.values()
+        yield {}, sum(1 for state in states if state.is_playing)
+
+    def guild_states():
+        yield {'stat': 'loaded'}, len(music_manager.server_states)
+        yield {'stat': 'evicted'}, music_manager.evicted_count
+
+    def queued_tracks():
+        lengths = [len(state.music_queue) for state in music_manager.server_states.values()]
+        yield {'stat': 'total'}, sum(lengths)
+        yield {'stat': 'max'}, max(lengths, default=0)
+
+    def cache_requests():
+        track_cache = get_track_cache()
+        audio_cache = get_audio_cache()
+        yield {'cache': 'track', 'result': 'hit'}, track_cache.hits
+        yield {'cache': 'track', 'result': 'miss'}, track_cache.misses
+        yield {'cache': 'track', 'result': 'locked'}, track_cache.lock_failures  # 공유 캐시 잠금으로 건너뛴 조회/저장
+        yield {'cache': 'audio', 'result': 'hit'}, audio_cache.hits
+        yield {'cache': 'audio', 'result': 'miss'}, audio_cache.misses
+
+    def extractor_queue():
+        extractor = get_extractor()
+        yield {'stat': 'queue_depth'}, extractor.queue_depth
+        yield {'stat': 'in_flight'}, extractor.stats.in_flight
+
+    def extractor_requests():
+        stats = get_extractor().stats
+        yield {'result': 'completed'}, stats.completed
+        yield {'result': 'failed'}, stats.failed
+        yield {'result': 'coalesced'}, stats.coalesced
+
+    metrics.gauge("music_active_guilds", "현재 재생 중인 서버 수", active_guilds)
+    metrics.gauge("music_guild_states", "메모리에 있는 서버 상태 수와 누적 정리 수", guild_states)
+    metrics.gauge("music_queue_tracks", "대기열에 있는 곡 수", queued_tracks)
+    metrics.counter("music_cache_requests_total", "캐시 조회 결과", cache_requests)
+    metrics.gauge("music_extractor_queue", "추출 executor 대기열 상태", extractor_queue)
+    metrics.counter("music_extractor_requests_total", "추출 요청 결과", extractor_requests)
+
+async def setup(bot):
+    """메트릭 수집기를 등록하고 설정에 따라 HTTP 서버를 시작합니다."""
+    _register_collectors(bot)
+    if settings.metrics_enabled:
+        bot.metrics_server = MetricsServer(metrics, settings.metrics_host, settings.metrics_port)
+        await bot.metrics_server.start()
+
+async def teardown(bot):
+    """메트릭 서버를 종료합니다."""
+    server = getattr(bot, 'metrics_server', None)
+    if server is not None:
+        await server.stop()
@@ -3,20 +3,270 @@
 음악 재생과 관련된 상태를 관리합니다.
 """
 
-from collections import deque
-from typing import Optional, Deque
-from datetime import datetime
+from itertools import chain, islice
+from typing import Any, NamedTuple, Optional, Iterable, Iterator, List, Tuple
+from datetime import datetime, timedelta
 import asyncio
 import logging
-import discord
+import time
 import discord
 from config import Track, settings
+from .extractor import get_extractor, stream_needs_refresh
+from .track_cache import track_to_dict, track_from_dict
+from .state_store import get_state_store
+from .audio_cache import get_audio_cache
+from .suggestions import get_suggestions
+from .metrics import get_metrics
+from .tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
+class IndexedQueue:
+    """
+    위치 기반 연산이 빠른 대기열
+    트랙을 일정 크기의 블록 리스트에 나눠 담고, 블록 크기를 펜윅 트리로 관리하여
+    위치 삽입/삭제/이동은 O(log n), 맨 앞 꺼내기는 O(1)로 처리합니다.
+    """
+
+    _LOAD = 256  # 블록 기본 크기 (2배를 넘으면 분할)
+
+    def __init__(self, iterable: Iterable[Track] = ()):
+        self._blocks: List[List[Track]] = []
+        self._tree: List[int] = [0]  # 블록 크기의 펜윅 트리 (1-based)
+        self._len = 0
+        self.version = 0  # 내용이 바뀔 때마다 증가 (스냅샷/대기열 화면 캐시 무효화용)
+        self._snapshot: Tuple[int, Tuple[Track, ...]] = (0, ())
+        self.extend(iterable)
+
+    def _rebuild(self):
+        """블록 구성이 바뀌었을 때 펜윅 트리를 다시 만듦 (O(블록 수))"""
+        count = len(self._blocks)
+        tree = [0] * (count + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent <= count:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _update(self, block_index: int, delta: int):
+        i = block_index + 1
+        count = len(self._blocks)
+        while i <= count:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """전체 위치를 (블록 번호, 블록 내 위치)로 변환"""
+        count = len(self._blocks)
+        position = 0
+        step = 1 << count.bit_length()
+        while step:
+            candidate = position + step
+            if candidate <= count and self._tree[candidate] <= index:
+                position = candidate
+                index -= self._tree[candidate]
+            step >>= 1
+        return position, index
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("대기열 범위를 벗어난 위치입니다.")
+        return index
+
+    def _split(self, block_index: int):
+        block = self._blocks[block_index]
+        if len(block) > 2 * self._LOAD:
+            self._blocks[block_index:block_index + 1] = [block[:self._LOAD], block[self._LOAD:]]
+            self._rebuild()
+
+    def _shrink(self, block_index: int):
+        """블록에서 한 곡이 빠졌을 때 트리 갱신 (빈 블록은 제거)"""
+        if self._blocks[block_index]:
+            self._update(block_index, -1)
+        else:
+            del self._blocks[block_index]
+            self._rebuild()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Track]:
+        return chain.from_iterable(self._blocks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return list(self.iter_from(start, max(0, stop - start)))
+        block_index, offset = self._locate(self._normalize(index))
+        return self._blocks[block_index][offset]
+
+    def iter_from(self, start: int, count: Optional[int] = None) -> Iterator[Track]:
+        """start 위치부터 count곡을 순회 (앞부분을 건너뛰지 않고 바로 시작)"""
+        if start >= self._len:
+            return iter(())
+        block_index, offset = self._locate(max(0, start))
+        items = chain(
+            islice(self._blocks[block_index], offset, None),
+            chain.from_iterable(self._blocks[block_index + 1:])
+        )
+        return islice(items, count) if count is not None else items
+
+    def append(self, track: Track):
+        self.version += 1
+        if not self._blocks:
+            self._blocks.append([track])
+            self._rebuild()
+        else:
+            last = len(self._blocks) - 1
+            self._blocks[last].append(track)
+            self._update(last, 1)
+            self._split(last)
+        self._len += 1
+
+    def extend(self, tracks: Iterable[Track]):
+        tracks = list(tracks)
+        if not tracks:
+            return
+        self.version += 1
+        if self._blocks:
+            room = max(0, self._LOAD - len(self._blocks[-1]))
+            self._blocks[-1].extend(tracks[:room])
+            tracks_left = tracks[room:]
+        else:
+            tracks_left = tracks
+        for start in range(0, len(tracks_left), self._LOAD):
+            self._blocks.append(tracks_left[start:start + self._LOAD])
+        self._len += len(tracks)
+        self._rebuild()
+
+    def insert(self, index: int, track: Track):
+        if index < 0:
+            index = max(0, index + self._len)
+        if index >= self._len:
+            self.append(track)
+            return
+        block_index, offset = self._locate(index)
+        self.version += 1
+        self._blocks[block_index].insert(offset, track)
+        self._update(block_index, 1)
+        self._len += 1
+        self._split(block_index)
+
+    def pop(self, index: int = -1) -> Track:
+        block_index, offset = self._locate(self._normalize(index))
+        track = self._blocks[block_index].pop(offset)
+        self.version += 1
+        self._len -= 1
+        self._shrink(block_index)
+        return track
+
+    def popleft(self) -> Track:
+        if not self._len:
+            raise IndexError("대기열이 비어있습니다.")
+        track = self._blocks[0].pop(0)
+        self.version += 1
+        self._len -= 1
+        self._shrink(0)
+        return track
+
+    def pop_many(self, indices: Iterable[int]) -> List[Track]:
+        """
+        여러 위치의 트랙을 한 번에 제거하고 제거된 트랙을 위치 순서대로 반환
+        해당 블록만 한 번씩 다시 만들고 트리는 마지막에 한 번만 갱신합니다.
+        """
+        targets = sorted({self._normalize(index) for index in indices})
+        if not targets:
+            return []
+        by_block = {}
+        for index in targets:
+            block_index, offset = self._locate(index)
+            by_block.setdefault(block_index, set()).add(offset)
+
+        removed = []
+        for block_index, offsets in by_block.items():
+            block = self._blocks[block_index]
+            removed.extend(block[offset] for offset in sorted(offsets))
+            self._blocks[block_index] = [track for offset, track in enumerate(block) if offset not in offsets]
+        self._blocks = [block for block in self._blocks if block]
+        self.version += 1
+        self._len -= len(removed)
+        self._rebuild()
+        return removed
+
+    def move(self, from_pos: int, to_pos: int):
+        """from_pos의 트랙을 to_pos 위치로 이동"""
+        self.insert(to_pos, self.pop(from_pos))
+
+    def touch(self):
+        """트랙 객체의 내용만 바뀌었을 때 (지연 추출 완료 등) 버전을 올려 캐시를 무효화"""
+        self.version += 1
+
+    def clear(self):
+        self.version += 1
+        self._blocks = []
+        self._tree = [0]
+        self._len = 0
+
+    def snapshot(self) -> Tuple[Track, ...]:
+        """
+        현재 대기열의 읽기 전용 스냅샷을 반환
+        변경이 없으면 이전 스냅샷을 그대로 공유하고, 버전이 바뀐 뒤 처음 요청될 때만 새로 만듭니다.
+        """
+        version, tracks = self._snapshot
+        if version != self.version:
+            tracks = tuple(chain.from_iterable(self._blocks))
+            self._snapshot = (self.version, tracks)
+        return tracks
+
+    def __repr__(self) -> str:
+        return f"IndexedQueue(len={self._len}, blocks={len(self._blocks)})"
+
+def _seek_options(options: dict, offset: float) -> dict:
+    """FFmpeg 옵션에 시작 위치(-ss)를 추가 (입력 옵션이므로 before_options 앞에 둠)"""
+    if offset <= 0:
+        return options
+    options = dict(options)
+    options['before_options'] = f"-ss {offset:.1f} {options.get('before_options', '')}".strip()
+    return options
+
+class _FirstPacketSource(discord.AudioSource):
+    """첫 오디오 패킷을 읽을 때 콜백을 한 번 호출하는 소스 래퍼 (read는 음성 스레드에서 호출됨)"""
+
+    def __init__(self, source: discord.AudioSource, on_first_packet):
+        self.source = source
+        self._on_first_packet = on_first_packet
+
+    def read(self) -> bytes:
+        data = self.source.read()
+        if self._on_first_packet is not None and data:
+            callback, self._on_first_packet = self._on_first_packet, None
+            callback()
+        return data
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self):
+        self.source.cleanup()
+
+class PlayerEvent(NamedTuple):
+    """서버별 재생 작업이 처리하는 이벤트 (play: 재생 요청, finished: 곡 종료)"""
+    kind: str
+    voice_client: Any
+    token: int = 0  # finished: 종료된 곡의 재생 번호 (이전 곡의 늦은 이벤트 구분용)
+    error: Optional[Exception] = None
+    ended_at: Optional[float] = None
+    waiter: Optional[asyncio.Future] = None  # play: 처리 결과(재생 시작 여부)를 받을 Future
+
 class ServerMusicState:
-    def __init__(self):
-        self.music_queue: Deque[Track] = deque()
+    def __init__(self, guild_id: Optional[int] = None):
+        self.guild_id = guild_id
+        self.music_queue: IndexedQueue = IndexedQueue()
         self.current_track: Optional[Track] = None
         self.start_time: Optional[datetime] = None
         self.voice_client = None
@@ -26,27 +276,125 @@ class ServerMusicState:
         self._is_playing: bool = False
         self._lock = asyncio.Lock()
         self._previous_queue = []
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._prewarm_task: Optional[asyncio.Task] = None
+        self._prewarmed_track: Optional[Track] = None
+        self._track_ended_at: Optional[float] = None  # 곡 전환 지연 측정용
+        self._events: Optional[asyncio.Queue] = None  # 재생 작업의 이벤트 큐 (PlayerEvent)
+        self._player_task: Optional[asyncio.Task] = None
+        self._play_token: int = 0  # 재생을 시작할 때마다 증가
+        self._audio_started: bool = False  # 현재 곡의 첫 오디오 패킷이 전송되었는지
+        self._audio_waiters: List[asyncio.Future] = []  # 첫 오디오 전송(True) 또는 실패(False)를 기다리는 재생 요청
+        self.requested_at: Optional[float] = None  # /재생 요청 시각 (첫 재생까지의 지연 측정용)
+        self.queue_generation: int = 0  # 대기열 초기화 시 증가 (백그라운드 작업 중단용)
+        self.last_active: float = time.monotonic()  # 유휴 상태 정리 기준 시각
+        # 영구 저장/복원용 정보
+        self.voice_channel_id: Optional[int] = None
+        self.text_channel_id: Optional[int] = None
+        self.resume_position: float = 0.0  # 복원 시 현재 곡을 이어서 재생할 위치 (초)
+        self.resume_pending: bool = False  # 재시작 전에 재생 중이었는지 (복원 후 이어서 재생)
+        self.journal_length: int = 0  # 마지막 스냅샷 이후 저널 항목 수
     
     @property
     def is_playing(self) -> bool:
         return self._is_playing and self.voice_client and self.voice_client.is_playing()
     
+    @property
+    def position(self) -> float:
+        """현재 곡의 재생 위치 (초)"""
+        if not self.start_time:
+            return 0.0
+        return max(0.0, (datetime.now() - self.start_time).total_seconds())
+
+    @property
+    def journaling(self) -> bool:
+        """상태 변경을 저널에 기록하는지 (저장소가 비활성화되어 있으면 기록할 인자를 만들 필요 없음)"""
+        return get_state_store().enabled
+
+    def record(self, op: str, **args):
+        """상태 변경을 저장소의 저널에 기록 (저장소가 비활성화되어 있으면 무시)"""
+        store = get_state_store()
+        if store.enabled:
+            store.append(self.guild_id, op, args)
+            self.journal_length += 1
+
     async def add_track(self, track: Track):
         """트랙을 대기열에 추가"""
         async with self._lock:
             self.music_queue.append(track)
-            logger.info(f"트랙이 대기열에 추가됨: {track.title} (대기열 크기: {len(self.music_queue)})")
-            logger.info(f"DEBUG: add_track - GuildState ID: {id(self)}, Queue ID: {id(self.music_queue)}")
+            if self.journaling:
+                self.record('add', tracks=[track_to_dict(track)])
+            get_tracer().event(self.guild_id, "queue.add", title=track.title, size=len(self.music_queue))
+
+    async def add_tracks(self, tracks: List[Track]) -> int:
+        """여러 트랙을 한 번에 대기열 끝에 추가하고 첫 트랙의 위치(0부터)를 반환"""
+        async with self._lock:
+            start = len(self.music_queue)
+            if tracks:
+                self.music_queue.extend(tracks)
+                if self.journaling:
+                    self.record('add', tracks=[track_to_dict(track) for track in tracks])
+                get_tracer().event(self.guild_id, "queue.add", count=len(tracks), size=len(self.music_queue))
+            return start
     
     async def clear_queue(self):
         """대기열 초기화"""
         async with self._lock:
             self.music_queue.clear()
             self._previous_queue.clear()
+            self.record('clear')
+            self.queue_generation += 1
+            if self._prewarm_task and not self._prewarm_task.done():
+                self._prewarm_task.cancel()
+            self.discard_prewarmed()
             logger.info("대기열이 초기화되었습니다.")
 
-    async def handle_repeat_mode(self) -> Optional[Track]:
-        """반복 모드 처리"""
+    def set_repeat_mode(self, mode: str):
+        """반복 모드 변경 (none, single, all)"""
+        self._repeat_mode = mode
+        self.record('repeat', mode=mode)
+
+    def set_voice(self, voice_client, text_channel=None):
+        """음성 클라이언트와 텍스트 채널을 기록 (재시작 후 다시 연결할 채널)"""
+        self.voice_client = voice_client
+        if text_channel:
+            self.text_channel = text_channel
+        voice_channel_id = getattr(getattr(voice_client, 'channel', None), 'id', None)
+        text_channel_id = getattr(self.text_channel, 'id', None)
+        if (voice_channel_id, text_channel_id) != (self.voice_channel_id, self.text_channel_id):
+            self.voice_channel_id, self.text_channel_id = voice_channel_id, text_channel_id
+            self.record('voice', voice_channel_id=voice_channel_id, text_channel_id=text_channel_id)
+
+    def mark_stopped(self):
+        """재생을 멈추고 음성 채널에서 나갔음을 기록"""
+        self._is_playing = False
+        self.current_track = None
+        self.start_time = None
+        self.voice_client = None
+        self.voice_channel_id = None
+        self.resume_pending = False
+        self.record('stop')
+
+    def peek_next_track(self) -> Optional[Track]:
+        """현재 곡이 끝났을 때 재생될 트랙을 반환 (대기열은 변경하지 않음)"""
+        if self._repeat_mode == "single" and self.current_track:
+            return self.current_track
+        if self.music_queue:
+            return self.music_queue[0]
+        if self._repeat_mode == "all" and self._previous_queue:
+            return self._previous_queue[0]
+        return None
+
+    def discard_prewarmed(self):
+        """미리 준비해둔 FFmpeg 소스를 정리"""
+        track = self._prewarmed_track
+        self._prewarmed_track = None
+        if track and track.source and track is not self.current_track:
+            track.source.cleanup()
+            track.source = None
+
+    def advance_repeat(self) -> Optional[Track]:
+        """곡이 끝났을 때의 반복 모드 처리 (한곡 반복이면 다시 재생할 곡을 반환)"""
         if not self.current_track:
             return None
             
@@ -65,286 +413,663 @@ class ServerMusicState:
             
         return None
 
+    def is_idle(self, now: float, ttl: float) -> bool:
+        """재생/음성 연결 없이 ttl초 이상 사용되지 않았는지 확인"""
+        if self._is_playing or self.resume_pending or self._lock.locked() or now - self.last_active < ttl:
+            return False
+        if self.voice_client and self.voice_client.is_connected():
+            return False
+        return not (self._prefetch_task and not self._prefetch_task.done())
+
+    def release(self):
+        """메모리에서 제거되기 전에 FFmpeg 소스와 백그라운드 작업을 정리"""
+        if self._player_task and not self._player_task.done():
+            self._player_task.cancel()
+        if self._prewarm_task and not self._prewarm_task.done():
+            self._prewarm_task.cancel()
+        self.discard_prewarmed()
+        if self.current_track and self.current_track.source:
+            self.current_track.source.cleanup()
+            self.current_track.source = None
+
+    def to_dict(self) -> Optional[dict]:
+        """디스크에 저장할 스냅샷 (기본 상태와 같으면 None)"""
+        if (not self.music_queue and not self._previous_queue and not self.current_track
+                and self._repeat_mode == "none" and not self.voice_channel_id):
+            return None
+        playing = self._is_playing or self.resume_pending
+        return {
+            'queue': [track_to_dict(track) for track in self.music_queue],
+            'previous_queue': [track_to_dict(track) for track in self._previous_queue],
+            'current_track': track_to_dict(self.current_track) if self.current_track else None,
+            'position': self.position if self._is_playing else self.resume_position,
+            'playing': playing,
+            'repeat_mode': self._repeat_mode,
+            'volume': self._volume,
+            'voice_channel_id': self.voice_channel_id,
+            'text_channel_id': self.text_channel_id,
+        }
+
+    def restore(self, data: Optional[dict], journal: Iterable[Tuple[str, dict]] = ()):
+        """to_dict로 저장한 스냅샷을 복원하고 그 이후의 저널을 순서대로 다시 적용"""
+        if data:
+            self.music_queue.extend(track_from_dict(track) for track in data.get('queue', ()))
+            self._previous_queue = [track_from_dict(track) for track in data.get('previous_queue', ())]
+            current = data.get('current_track')
+            self.current_track = track_from_dict(current) if current else None
+            self.resume_position = data.get('position', 0.0)
+            self.resume_pending = bool(data.get('playing')) and self.current_track is not None
+            self._repeat_mode = data.get('repeat_mode', "none")
+            self._volume = data.get('volume', 1.0)
+            self.voice_channel_id = data.get('voice_channel_id')
+            self.text_channel_id = data.get('text_channel_id')
+        for op, args in journal:
+            self._replay(op, args)
+
+    def _replay(self, op: str, args: dict):
+        """저널 항목 하나를 적용 (record로 기록한 변경을 그대로 재현)"""
+        queue = self.music_queue
+        if op == 'add':
+            queue.extend(track_from_dict(track) for track in args['tracks'])
+        elif op == 'remove':
+            if 0 <= args['index'] < len(queue):
+                queue.pop(args['index'])
+        elif op == 'remove_many':
+            queue.pop_many(index for index in args['indices'] if 0 <= index < len(queue))
+        elif op == 'move':
+            if 0 <= args['from_pos'] < len(queue) and 0 <= args['to_pos'] < len(queue):
+                queue.move(args['from_pos'], args['to_pos'])
+        elif op == 'replace':
+            queue.clear()
+            queue.extend(track_from_dict(track) for track in args['tracks'])
+        elif op == 'clear':
+            queue.clear()
+            self._previous_queue.clear()
+        elif op == 'repeat':
+            self._repeat_mode = args['mode']
+        elif op == 'play':
+            if not args.get('resumed'):
+                self.advance_repeat()
+                if args.get('popped') and queue:
+                    queue.popleft()
+            if args.get('track'):
+                self.current_track = track_from_dict(args['track'])
+                self.resume_position = args.get('position', 0.0)
+                self.resume_pending = True
+            else:
+                self.resume_pending = False
+        elif op == 'position':
+            self.resume_position = args['seconds']
+        elif op == 'idle':
+            self.resume_pending = False
+        elif op == 'stop':
+            self.current_track = None
+            self.resume_position = 0.0
+            self.resume_pending = False
+            self.voice_channel_id = None
+        elif op == 'voice':
+            self.voice_channel_id = args.get('voice_channel_id')
+            self.text_channel_id = args.get('text_channel_id')
+        else:
+            logger.warning(f"알 수 없는 저널 항목을 건너뜁니다: {op}")
+
+    def refresh_candidates(self) -> list:
+        """곧 재생될 가능성이 있어 스트리밍 URL을 미리 갱신할 트랙 목록"""
+        lookahead = settings.stream_refresh_lookahead
+        candidates = [self.music_queue[i] for i in range(min(lookahead, len(self.music_queue)))]
+        if self._repeat_mode == "single" and self.current_track:
+            candidates.append(self.current_track)
+        elif self._repeat_mode == "all":
+            # 대기열이 짧으면 전체 반복으로 곧 다시 재생될 곡들
+            candidates.extend(self._previous_queue[:max(0, lookahead - len(self.music_queue))])
+        return candidates
+
 class MusicManager:
     def __init__(self, bot):
         self.bot = bot
         self._lock = asyncio.Lock()
         self.server_states = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._sweep_task: Optional[asyncio.Task] = None
+        self._persist_task: Optional[asyncio.Task] = None
+        self.evicted_count = 0
     
     def get_server_state(self, guild_id: int) -> ServerMusicState:
-        """서버별 상태를 가져오거나 생성"""
-        if guild_id not in self.server_states:
-            self.server_states[guild_id] = ServerMusicState()
-        return self.server_states[guild_id]
+        """서버별 상태를 가져오거나 생성 (유휴 정리로 저장된 상태가 있으면 복원)"""
+        state = self.server_states.get(guild_id)
+        if state is None:
+            state = self.server_states[guild_id] = ServerMusicState(guild_id)
+            snapshot, journal = get_state_store().load(guild_id)
+            if snapshot or journal:
+                state.restore(snapshot, journal)
+                state.resume_pending = False  # 필요할 때 불러온 서버는 자동으로 이어서 재생하지 않음
+                logger.info(f"서버 {guild_id}의 저장된 대기열을 복원했습니다 ({len(state.music_queue)}곡)")
+        state.last_active = time.monotonic()
+        return state
+
+    def start_state_sweeper(self):
+        """유휴 서버 상태 정리 백그라운드 작업을 시작"""
+        if self._sweep_task is None or self._sweep_task.done():
+            self._sweep_task = self.bot.loop.create_task(self._state_sweep_loop())
+
+    async def _state_sweep_loop(self):
+        """주기적으로 유휴 서버 상태를 메모리에서 제거"""
+        while True:
+            try:
+                await asyncio.sleep(settings.state_sweep_interval)
+                self.evict_idle_states()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"유휴 서버 상태 정리 작업 오류: {e}")
+
+    def evict_idle_states(self, ttl: Optional[float] = None) -> int:
+        """
+        유휴 서버 상태를 제거하고 제거한 수를 반환
+        상태 저장소가 활성화되어 있으면 대기열과 반복 모드를 저장해 두었다가 다음 사용 시 복원합니다.
+        """
+        ttl = settings.state_idle_ttl if ttl is None else ttl
+        now = time.monotonic()
+        tracer = get_tracer()
+        evicted = 0
+        for guild_id, state in list(self.server_states.items()):
+            if not state.is_idle(now, ttl):
+                continue
+            state.release()
+            self.save_snapshot(state)
+            del self.server_states[guild_id]
+            tracer.forget(guild_id)
+            evicted += 1
+        if evicted:
+            self.evicted_count += evicted
+            logger.info(f"유휴 서버 상태 {evicted}개를 정리했습니다 (남은 서버: {len(self.server_states)})")
+        return evicted
     
-    async def play_next_song(self, voice_client, guild_id: int):
-        """다음 곡을 재생하는 함수"""
-        guild_state = self.get_server_state(guild_id)
-        
+    def save_snapshot(self, state: ServerMusicState):
+        """서버 상태를 스냅샷으로 저장하고 저널을 압축 (기본 상태면 저장된 항목을 삭제)"""
+        store = get_state_store()
+        if not store.enabled:
+            return
+        data = state.to_dict()
+        if data:
+            store.save(state.guild_id, data)
+        else:
+            store.delete(state.guild_id)
+        state.journal_length = 0
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """이 프로세스의 샤드가 담당하는 서버인지 확인 (클러스터 모드에서 저장소를 공유할 때 사용)"""
+        shard_ids = getattr(self.bot, 'shard_ids', None)
+        shard_count = getattr(self.bot, 'shard_count', None)
+        if not shard_ids or not shard_count:
+            return True
+        return (guild_id >> 22) % shard_count in shard_ids
+
+    def restore_states(self) -> int:
+        """
+        시작 시 재생 중이던 서버의 상태를 저장소에서 복원하고 복원한 수를 반환
+        트랙은 저장된 메타데이터로만 복원하며(추출 없음), 나머지 서버는 처음 사용될 때 불러옵니다.
+        """
+        store = get_state_store()
+        if not store.enabled:
+            return 0
+        started = time.monotonic()
+        saved = store.load_all()
+        restored = 0
+        for guild_id, (snapshot, journal) in saved.items():
+            if not self.owns_guild(guild_id):
+                continue
+            state = ServerMusicState(guild_id)
+            state.restore(snapshot, journal)
+            if state.resume_pending and state.voice_channel_id:
+                self.server_states[guild_id] = state
+                restored += 1
+        logger.info(
+            f"저장된 서버 상태 복원: {restored}개 서버 재생 대기 "
+            f"(저장된 서버 {len(saved)}개, {time.monotonic() - started:.3f}초)"
+        )
+        return restored
+
+    async def resume_restored_playback(self):
+        """봇이 준비되면 복원된 서버의 음성 채널에 다시 연결하고 저장된 위치부터 이어서 재생"""
+        await self.bot.wait_until_ready()
+        semaphore = asyncio.Semaphore(settings.state_resume_concurrency)
+
+        async def resume(state: ServerMusicState):
+            async with semaphore:
+                await self._resume(state)
+
+        pending = [state for state in self.server_states.values() if state.resume_pending]
+        await asyncio.gather(*(resume(state) for state in pending))
+
+    async def _resume(self, state: ServerMusicState):
+        """서버 하나의 재생을 이어서 시작"""
         try:
-            logger.info(f"play_next_song 함수 시작 - guild_id: {guild_id}")
-            logger.info(f"DEBUG: play_next_song - MusicManager ID: {id(self)}, GuildState ID: {id(guild_state)}, Queue ID: {id(guild_state.music_queue)}")
-            logger.info(f"현재 대기열 크기: {len(guild_state.music_queue)}")
-            logger.info(f"현재 트랙: {guild_state.current_track.title if guild_state.current_track else 'None'}")
-            
-            if not voice_client or not voice_client.is_connected():
-                logger.error("Voice client is not connected")
+            channel = self.bot.get_channel(state.voice_channel_id)
+            if channel is None:
+                logger.warning(f"서버 {state.guild_id}의 음성 채널을 찾을 수 없어 이어서 재생하지 않습니다.")
+                state.resume_pending = False
                 return
+            voice_client = channel.guild.voice_client or await channel.connect()
+            text_channel = self.bot.get_channel(state.text_channel_id) if state.text_channel_id else None
+            state.set_voice(voice_client, text_channel)
+            logger.info(
+                f"서버 {state.guild_id} 재생 복원: {state.current_track.title} "
+                f"({state.resume_position:.0f}초부터, 대기열 {len(state.music_queue)}곡)"
+            )
+            await self.play_next_song(voice_client, state.guild_id)
+        except Exception as e:
+            logger.error(f"서버 {state.guild_id} 재생 복원 실패: {e}")
+            state.resume_pending = False
 
-            repeat_track = await guild_state.handle_repeat_mode()
-            next_track = repeat_track or (guild_state.music_queue.popleft() if guild_state.music_queue else None)
-            
-            if next_track:
-                logger.info(f"재생할 트랙 발견: {next_track.title}")
-                guild_state.current_track = next_track
-                guild_state.start_time = datetime.now()
-                guild_state._is_playing = True
-
-                try:
-                    # Track 객체에 이미 source가 있는지 확인
-                    if not next_track.source:
-                        # 새로운 음원 생성 (최적화된 옵션 사용)
-                        logger.info(f"음원 소스 생성 시작: {next_track.title}")
-                        logger.info(f"음원 URL: {next_track.url}")
-                        
-                        source = await discord.FFmpegOpusAudio.from_probe(
-                            next_track.url,
-                            method='fallback',
-                            **settings.ffmpeg_options
-                        )
-                        next_track.source = source  # 소스 저장
-                        logger.info(f"음원 소스 생성 완료: {next_track.title}")
-                    else:
-                        source = next_track.source
-                        logger.info(f"기존 음원 소스 사용: {next_track.title}")
-
-                    # 음성 클라이언트 상태 재확인
-                    if not voice_client.is_connected():
-                        logger.error("재생 시작 전 음성 클라이언트 연결 끊어짐")
-                        guild_state._is_playing = False
-                        return
-
-                    logger.info(f"재생 시작 직전 - 음성 클라이언트 상태: 연결={voice_client.is_connected()}, 재생={voice_client.is_playing()}")
-
-                    def after_playing(error):
-                        if error:
-                            logger.error(f"재생 중 오류 발생: {error}")
-                        else:
-                            logger.info(f"재생 완료: {next_track.title}")
-                        
-                        # 재생 완료 후 다음 곡이 있는지 확인
-                        logger.info(f"DEBUG: after_playing - GuildState ID: {id(guild_state)}, Queue ID: {id(guild_state.music_queue)}, Queue Len: {len(guild_state.music_queue)}")
-                        if guild_state.music_queue:
-                            logger.info("다음 곡이 대기열에 있음, 자동 재생")
-                            # 다음 곡 재생
-                            asyncio.run_coroutine_threadsafe(
-                                self.play_next_song(voice_client, guild_id),
-                                self.bot.loop
-                            )
-                        else:
-                            logger.info("대기열이 비어있음, 재생 종료")
-                            guild_state._is_playing = False
-
-                    # 재생 시작
-                    voice_client.play(source, after=after_playing)
-                    logger.info(f"재생 시작 명령 실행: {next_track.title}")
-
-                except Exception as e:
-                    logger.error(f"음원 생성 중 오류: {e}")
-                    guild_state._is_playing = False
-                    # 오류 발생 시 다음 곡으로 넘어가기
-                    await asyncio.sleep(1)  # 잠시 대기
-                    await self.play_next_song(voice_client, guild_id)
+    def start_persistence(self):
+        """저널 기록 및 체크포인트 백그라운드 작업을 시작"""
+        if not get_state_store().enabled:
+            return
+        if self._persist_task is None or self._persist_task.done():
+            self._persist_task = self.bot.loop.create_task(self._persistence_loop())
 
-            else:
-                logger.info("재생할 트랙이 없음")
-                logger.info(f"대기열 상태: 크기={len(guild_state.music_queue)}, 현재트랙={guild_state.current_track.title if guild_state.current_track else 'None'}")
-                guild_state._is_playing = False
-                if guild_state.text_channel:
-                    await guild_state.text_channel.send("🎵 재생할 곡이 없습니다.")
+    async def _persistence_loop(self):
+        """저널을 주기적으로 디스크에 기록하고, 체크포인트 주기마다 재생 위치 기록/스냅샷 압축"""
+        store = get_state_store()
+        next_checkpoint = time.monotonic() + settings.state_checkpoint_interval
+        while True:
+            try:
+                await asyncio.sleep(settings.state_journal_flush_interval)
+                if time.monotonic() >= next_checkpoint:
+                    next_checkpoint = time.monotonic() + settings.state_checkpoint_interval
+                    self.checkpoint()
+                store.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"서버 상태 저장 작업 오류: {e}")
 
-        except Exception as e:
-            logger.error(f"재생 처리 중 오류: {e}")
-            guild_state._is_playing = False
+    def checkpoint(self):
+        """재생 중인 곡의 위치를 기록하고, 저널이 길어진 서버는 스냅샷으로 압축"""
+        for state in list(self.server_states.values()):
+            if state._is_playing and state.current_track:
+                state.record('position', seconds=state.position)
+            if state.journal_length >= settings.state_snapshot_ops:
+                self.save_snapshot(state)
 
-    async def update_voice_state(self, guild_id: int, voice_client, text_channel=None):
-        """서버의 음성 상태를 업데이트"""
+    def save_all(self):
+        """종료 시 모든 서버의 현재 상태(재생 위치 포함)를 스냅샷으로 저장"""
+        store = get_state_store()
+        if not store.enabled:
+            return
+        for state in list(self.server_states.values()):
+            self.save_snapshot(state)
+        store.close()
+        logger.info(f"서버 상태 {len(self.server_states)}개를 저장했습니다.")
+
+    def start_stream_refresher(self):
+        """스트리밍 URL 갱신 백그라운드 작업을 시작"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self.bot.loop.create_task(self._stream_refresh_loop())
+
+    async def _stream_refresh_loop(self):
+        """곧 재생될 트랙의 URL이 만료되기 전에 주기적으로 갱신"""
+        while True:
+            try:
+                await asyncio.sleep(settings.stream_refresh_interval)
+                for state in list(self.server_states.values()):
+                    for track in state.refresh_candidates():
+                        if stream_needs_refresh(track):
+                            await self.resolve_track(state, track)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"스트리밍 URL 갱신 작업 오류: {e}")
+
+    def schedule_prefetch(self, guild_id: int):
+        """재생 위치 앞쪽 N곡을 미리 추출하는 작업을 예약 (서버당 하나만 실행)"""
         state = self.get_server_state(guild_id)
-"""
-봇의 핵심 기능을 담당하는 모듈
-음악 재생과 관련된 상태를 관리합니다.
-"""
+        if state._prefetch_task is None or state._prefetch_task.done():
+            state._prefetch_task = self.bot.loop.create_task(self._prefetch(state))
 
-from collections import deque
-from typing import Optional, Deque
-from datetime import datetime
-import asyncio
-import logging
-import discord
-import discord
-from config import Track, settings
+    async def _prefetch(self, state: ServerMusicState):
+        """다음에 재생될 트랙 중 추출되지 않은 트랙만 추출"""
+        try:
+            for track in list(islice(state.music_queue, settings.prefetch_ahead)):
+                if stream_needs_refresh(track):
+                    await self.resolve_track(state, track)
+        except Exception as e:
+            logger.error(f"다음 곡 미리 추출 중 오류: {e}")
 
-logger = logging.getLogger(__name__)
+    async def resolve_track(self, state: ServerMusicState, track: Track, refresh: bool = False) -> bool:
+        """
+        트랙을 추출(refresh면 URL만 다시 추출)하고 성공하면 대기열 버전을 올림
+        추출 결과는 대기열의 Track 객체에 그대로 채워지므로, 버전을 올려야 대기열 화면 캐시에 제목/길이가 반영됩니다.
+        """
+        extractor = get_extractor()
+        resolved = await (extractor.refresh_stream(track, loop=self.bot.loop) if refresh
+                          else extractor.resolve_track(track, loop=self.bot.loop))
+        if resolved:
+            state.music_queue.touch()
+        return resolved
 
-class ServerMusicState:
-    def __init__(self):
-        self.music_queue: Deque[Track] = deque()
-        self.current_track: Optional[Track] = None
-        self.start_time: Optional[datetime] = None
-        self.voice_client = None
-        self.text_channel = None
-        self._repeat_mode: str = "none"
-        self._volume: float = 1.0
-        self._is_playing: bool = False
-        self._lock = asyncio.Lock()
-        self._previous_queue = []
-    
-    @property
-    def is_playing(self) -> bool:
-        return self._is_playing and self.voice_client and self.voice_client.is_playing()
-    
-    async def add_track(self, track: Track):
-        """트랙을 대기열에 추가"""
-        async with self._lock:
-            self.music_queue.append(track)
-            logger.info(f"트랙이 대기열에 추가됨: {track.title} (대기열 크기: {len(self.music_queue)})")
-            logger.info(f"DEBUG: add_track - GuildState ID: {id(self)}, Queue ID: {id(self.music_queue)}")
-    
-    async def clear_queue(self):
-        """대기열 초기화"""
-        async with self._lock:
-            self.music_queue.clear()
-            self._previous_queue.clear()
-            logger.info("대기열이 초기화되었습니다.")
+    async def create_source(self, track: Track, local_path: Optional[str] = None, offset: float = 0.0):
+        """트랙의 FFmpeg 음원 소스를 생성하고 소요 시간을 기록"""
+        started = time.monotonic()
+        try:
+            return await self._open_source(track, local_path, offset)
+        finally:
+            get_metrics().observe_stage("source_create", time.monotonic() - started)
 
-    async def handle_repeat_mode(self) -> Optional[Track]:
-        """반복 모드 처리"""
-        if not self.current_track:
-            return None
-            
-        if self._repeat_mode == "single":
-            return self.current_track
-        elif self._repeat_mode == "all" and not self.music_queue:
-            # 전체 반복 모드에서 대기열이 비었을 때
-            self.music_queue.extend(self._previous_queue)
-            self._previous_queue.clear()
-            
-        if self._repeat_mode == "all":
-            self._previous_queue.append(self.current_track)
-            # 메모리 누수 방지를 위해 최대 50곡으로 제한
-            if len(self._previous_queue) > 50:
-                self._previous_queue.pop(0)
-            
-        return None
+    async def _open_source(self, track: Track, local_path: Optional[str] = None, offset: float = 0.0):
+        """
+        트랙의 스트리밍 URL로 FFmpeg 음원 소스를 생성
+        yt-dlp가 보고한 코덱을 알고 있으면 ffprobe를 생략하고, Opus 원본은 재인코딩 없이 remux합니다.
+        local_path가 주어지면 로컬 오디오 캐시 파일을 재생하고, offset(초)이 주어지면 해당 위치부터 재생합니다.
+        """
+        if local_path:
+            return discord.FFmpegOpusAudio(
+                local_path,
+                codec='copy',
+                bitrate=track.bitrate or settings.opus_bitrate,
+                **_seek_options(settings.ffmpeg_local_options, offset)
+            )
+        if track.codec == 'opus' and settings.opus_passthrough:
+            return discord.FFmpegOpusAudio(
+                track.url,
+                codec='copy',
+                bitrate=track.bitrate or settings.opus_bitrate,
+                **_seek_options(settings.ffmpeg_passthrough_options, offset)
+            )
+        if track.codec:
+            return discord.FFmpegOpusAudio(
+                track.url,
+                bitrate=settings.opus_bitrate,
+                **_seek_options(settings.ffmpeg_options, offset)
+            )
+        # 코덱 정보가 없으면 기존처럼 ffprobe로 확인
+        return await discord.FFmpegOpusAudio.from_probe(
+            track.url,
+            method='fallback',
+            **_seek_options(settings.ffmpeg_options, offset)
+        )
 
-class MusicManager:
-    def __init__(self, bot):
-        self.bot = bot
-        self._lock = asyncio.Lock()
-        self.server_states = {}
-    
-    def get_server_state(self, guild_id: int) -> ServerMusicState:
-        """서버별 상태를 가져오거나 생성"""
-        if guild_id not in self.server_states:
-            self.server_states[guild_id] = ServerMusicState()
-        return self.server_states[guild_id]
-    
-    async def play_next_song(self, voice_client, guild_id: int):
-        """다음 곡을 재생하는 함수"""
-        guild_state = self.get_server_state(guild_id)
-        
+    def schedule_prewarm(self, guild_id: int):
+        """현재 곡이 끝나기 직전에 다음 곡의 소스를 미리 준비하도록 예약"""
+        state = self.get_server_state(guild_id)
+        if state._prewarm_task and not state._prewarm_task.done():
+            state._prewarm_task.cancel()
+        if not settings.prewarm_enabled or not state.current_track:
+            return
+        state._prewarm_task = self.bot.loop.create_task(self._prewarm(state))
+
+    async def _prewarm(self, state: ServerMusicState):
+        """다음 트랙의 URL 추출과 FFmpeg 프로세스 생성을 곡 종료 전에 수행"""
         try:
-            logger.info(f"play_next_song 함수 시작 - guild_id: {guild_id}")
-            logger.info(f"DEBUG: play_next_song - MusicManager ID: {id(self)}, GuildState ID: {id(guild_state)}, Queue ID: {id(guild_state.music_queue)}")
-            logger.info(f"현재 대기열 크기: {len(guild_state.music_queue)}")
-            logger.info(f"현재 트랙: {guild_state.current_track.title if guild_state.current_track else 'None'}")
-            
-            if not voice_client or not voice_client.is_connected():
-                logger.error("Voice client is not connected")
+            # 너무 일찍 프로세스를 띄우면 연결이 유휴 상태로 오래 유지되므로 종료 직전까지 대기
+            duration = state.current_track.duration
+            if duration and state.start_time:
+                elapsed = (datetime.now() - state.start_time).total_seconds()
+                await asyncio.sleep(max(0.0, duration - elapsed - settings.prewarm_lead))
+
+            track = state.peek_next_track()
+            if not track or track.source:
+                return
+            local_path = get_audio_cache().lookup(track)
+            if not local_path and stream_needs_refresh(track):
+                await self.resolve_track(state, track)
+            if state.peek_next_track() is not track or track.source:
                 return
 
-            repeat_track = await guild_state.handle_repeat_mode()
-            next_track = repeat_track or (guild_state.music_queue.popleft() if guild_state.music_queue else None)
-            
-            if next_track:
-                logger.info(f"재생할 트랙 발견: {next_track.title}")
-                guild_state.current_track = next_track
-                guild_state.start_time = datetime.now()
-                guild_state._is_playing = True
-
-                try:
-                    # Track 객체에 이미 source가 있는지 확인
-                    if not next_track.source:
-                        # 새로운 음원 생성 (최적화된 옵션 사용)
-                        logger.info(f"음원 소스 생성 시작: {next_track.title}")
-                        logger.info(f"음원 URL: {next_track.url}")
-                        
-                        source = await discord.FFmpegOpusAudio.from_probe(
-                            next_track.url,
-                            method='fallback',
-                            **settings.ffmpeg_options
-                        )
-                        next_track.source = source  # 소스 저장
-                        logger.info(f"음원 소스 생성 완료: {next_track.title}")
+            started = time.monotonic()
+            track.source = await self.create_source(track, local_path)
+            if state._prewarmed_track is not track:
+                state.discard_prewarmed()
+            state._prewarmed_track = track
+            get_tracer().event(state.guild_id, "prewarm.ready", title=track.title, seconds=time.monotonic() - started)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"다음 곡 소스 미리 준비 중 오류: {e}")
+
+    def _record_transition(self, state: ServerMusicState, prewarmed: bool, started_at: float):
+        """이전 곡 종료부터 다음 곡 첫 오디오 패킷까지의 무음 시간을 기록"""
+        if state._track_ended_at is None:
+            return
+        gap = started_at - state._track_ended_at
+        state._track_ended_at = None
+        get_metrics().observe_stage("transition_gap", gap)
+        get_tracer().event(state.guild_id, "transition", gap=gap, prewarmed=prewarmed)
+
+    def _ensure_player(self, state: ServerMusicState) -> asyncio.Queue:
+        """서버의 재생 작업을 (없으면) 시작하고 이벤트 큐를 반환"""
+        if state._player_task is None or state._player_task.done():
+            state._events = asyncio.Queue()
+            state._player_task = self.bot.loop.create_task(self._player_loop(state))
+        return state._events
+
+    async def play_next_song(self, voice_client, guild_id: int) -> bool:
+        """
+        다음 곡 재생을 서버의 재생 작업에 요청하고 결과를 대기
+        첫 오디오 패킷이 전송되면 True, 재생할 곡이 없거나 시작하지 못하면 False를 반환합니다.
+        """
+        guild_state = self.get_server_state(guild_id)
+        waiter = self.bot.loop.create_future()
+        self._ensure_player(guild_state).put_nowait(PlayerEvent('play', voice_client, waiter=waiter))
+        return await waiter
+
+    async def _player_loop(self, state: ServerMusicState):
+        """
+        서버별 재생 작업
+        재생 요청과 곡 종료 이벤트를 하나씩 순서대로 처리하므로 곡 전환이 겹치지 않습니다.
+        """
+        tracer = get_tracer()
+        while True:
+            event = await state._events.get()
+            if event.kind == 'finished' and event.token != state._play_token:
+                continue  # 이미 다른 곡이 시작된 뒤 도착한 이전 곡의 종료 이벤트
+            if event.waiter:
+                state._audio_waiters.append(event.waiter)
+            started = False
+            try:
+                if event.kind == 'finished':
+                    state._track_ended_at = event.ended_at
+                    state._is_playing = False
+                    if event.error:
+                        logger.error(f"재생 중 오류 발생: {event.error}")
+                    tracer.event(state.guild_id, "play.finished", error=event.error, queue=len(state.music_queue))
+
+                    # 재생 완료 후 다음 곡이 있는지 확인
+                    if state.peek_next_track():
+                        started = await self._advance(state, event.voice_client)
                     else:
-                        source = next_track.source
-                        logger.info(f"기존 음원 소스 사용: {next_track.title}")
-
-                    # 음성 클라이언트 상태 재확인
-                    if not voice_client.is_connected():
-                        logger.error("재생 시작 전 음성 클라이언트 연결 끊어짐")
-                        guild_state._is_playing = False
-                        return
-
-                    logger.info(f"재생 시작 직전 - 음성 클라이언트 상태: 연결={voice_client.is_connected()}, 재생={voice_client.is_playing()}")
-
-                    def after_playing(error):
-                        if error:
-                            logger.error(f"재생 중 오류 발생: {error}")
-                        else:
-                            logger.info(f"재생 완료: {next_track.title}")
-                        
-                        # 재생 완료 후 다음 곡이 있는지 확인
-                        logger.info(f"DEBUG: after_playing - GuildState ID: {id(guild_state)}, Queue ID: {id(guild_state.music_queue)}, Queue Len: {len(guild_state.music_queue)}")
-                        if guild_state.music_queue:
-                            logger.info("다음 곡이 대기열에 있음, 자동 재생")
-                            # 다음 곡 재생
-                            asyncio.run_coroutine_threadsafe(
-                                self.play_next_song(voice_client, guild_id),
-                                self.bot.loop
-                            )
-                        else:
-                            logger.info("대기열이 비어있음, 재생 종료")
-                            guild_state._is_playing = False
-
-                    # 재생 시작
-                    voice_client.play(source, after=after_playing)
-                    logger.info(f"재생 시작 명령 실행: {next_track.title}")
-
-                except Exception as e:
-                    logger.error(f"음원 생성 중 오류: {e}")
-                    guild_state._is_playing = False
-                    # 오류 발생 시 다음 곡으로 넘어가기
-                    await asyncio.sleep(1)  # 잠시 대기
-                    await self.play_next_song(voice_client, guild_id)
+                        tracer.event(state.guild_id, "play.idle")
+                        state.record('idle')
+                elif event.voice_client and event.voice_client.is_playing():
+                    # 앞선 곡 종료 이벤트로 이미 다음 곡이 시작된 경우
+                    started = True
+                    if state._audio_started:
+                        self._resolve_audio_waiters(state, True)
+                else:
+                    started = await self._advance(state, event.voice_client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"재생 처리 중 오류: {e}")
+                state._is_playing = False
+            finally:
+                if not started:
+                    self._resolve_audio_waiters(state, False)
 
-            else:
-                logger.info("재생할 트랙이 없음")
-                logger.info(f"대기열 상태: 크기={len(guild_state.music_queue)}, 현재트랙={guild_state.current_track.title if guild_state.current_track else 'None'}")
-                guild_state._is_playing = False
-                if guild_state.text_channel:
-                    await guild_state.text_channel.send("🎵 재생할 곡이 없습니다.")
+    def _resolve_audio_waiters(self, state: ServerMusicState, started: bool):
+        """첫 오디오 전송 또는 재생 실패를 기다리는 요청에 결과를 전달"""
+        waiters, state._audio_waiters = state._audio_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(started)
 
-        except Exception as e:
-            logger.error(f"재생 처리 중 오류: {e}")
-            guild_state._is_playing = False
+    def _on_first_audio(self, state: ServerMusicState, token: int, prewarmed: bool, sent_at: float):
+        """첫 오디오 패킷이 전송되었을 때 (이벤트 루프에서 실행, sent_at은 음성 스레드에서 읽은 시각)"""
+        if token != state._play_token:
+            return
+        state._audio_started = True
+        self._record_transition(state, prewarmed, sent_at)
+        if state.requested_at is not None:
+            # /재생 요청부터 실제 첫 오디오 패킷까지의 지연
+            elapsed = sent_at - state.requested_at
+            state.requested_at = None
+            get_metrics().observe_stage("first_audio", elapsed)
+            get_tracer().event(state.guild_id, "play.first_audio", seconds=elapsed)
+        self._resolve_audio_waiters(state, True)
+
+    def _select_next(self, state: ServerMusicState) -> Tuple[Optional[Track], float]:
+        """다음에 재생할 곡과 시작 위치(초)를 정하고 저널에 기록"""
+        offset = 0.0
+        if state.resume_pending and state.current_track:
+            # 재시작 전 재생 중이던 곡을 저장된 위치부터 이어서 재생
+            next_track, offset = state.current_track, state.resume_position
+            if state.journaling:
+                state.record('play', track=track_to_dict(next_track), position=offset, resumed=True)
+        else:
+            repeat_track = state.advance_repeat()
+            next_track = repeat_track or (state.music_queue.popleft() if state.music_queue else None)
+            if state.journaling:
+                state.record(
+                    'play',
+                    track=track_to_dict(next_track) if next_track else None,
+                    popped=repeat_track is None and next_track is not None
+                )
+        state.resume_pending = False
+        state.resume_position = 0.0
+        return next_track, offset
+
+    async def _advance(self, state: ServerMusicState, voice_client) -> bool:
+        """
+        다음 곡을 골라 재생을 시작 (재생 작업에서만 호출)
+        시작하지 못한 곡은 재시도한 뒤 건너뛰고, 재생이 시작되면 True를 반환합니다.
+        """
+        guild_id = state.guild_id
+        tracer = get_tracer()
+        tracer.new_correlation(guild_id)
+        tracer.event(guild_id, "play_next.start", queue=len(state.music_queue))
+
+        if not voice_client or not voice_client.is_connected():
+            logger.error("Voice client is not connected")
+            return False
+        if state.voice_client is not voice_client:
+            state.set_voice(voice_client)
+
+        failed = set()
+        while True:
+            next_track, offset = self._select_next(state)
+            if next_track is None:
+                tracer.event(guild_id, "play_next.empty")
+                state._is_playing = False
+                if state.text_channel:
+                    await state.text_channel.send("🎵 재생할 곡이 없습니다.")
+                return False
+            if id(next_track) in failed:
+                # 반복 모드로 이미 실패한 곡이 다시 선택되면 재생을 멈춤
+                state._is_playing = False
+                state.record('idle')
+                return False
+
+            if await self._start_with_retries(state, voice_client, next_track, offset):
+                return True
+            if state.current_track is not next_track or not voice_client.is_connected():
+                return False  # 재시도 중 정지되었거나 연결이 끊김
+
+            failed.add(id(next_track))
+            tracer.event(guild_id, "play_next.skip", title=next_track.title)
+            if state.text_channel:
+                await state.text_channel.send(f"⚠️ 재생할 수 없어 건너뜁니다: **{next_track.title}**")
+
+    async def _start_with_retries(self, state: ServerMusicState, voice_client, track: Track, offset: float) -> bool:
+        """곡 재생을 시작하고, 실패하면 지수 백오프(상한 있음)로 정해진 횟수만큼 다시 시도"""
+        for attempt in range(settings.player_track_retries + 1):
+            if attempt:
+                delay = min(settings.player_retry_max_delay, settings.player_retry_delay * 2 ** (attempt - 1))
+                get_tracer().event(state.guild_id, "play_next.retry", attempt=attempt, delay=delay)
+                await asyncio.sleep(delay)
+                if state.current_track is not track or not voice_client.is_connected():
+                    return False
+            try:
+                return await self._start_track(state, voice_client, track, offset, refresh=attempt > 0)
+            except Exception as e:
+                logger.error(f"음원 생성 중 오류 ({attempt + 1}번째 시도): {e}")
+                state._is_playing = False
+        return False
+
+    async def _start_track(self, state: ServerMusicState, voice_client, track: Track,
+                           offset: float = 0.0, refresh: bool = False) -> bool:
+        """
+        곡의 음원 소스를 준비하고 재생을 시작
+        refresh가 True면 (재시도) 스트리밍 URL을 다시 추출합니다. 소스 준비에 실패하면 예외가 발생합니다.
+        """
+        guild_id = state.guild_id
+        tracer = get_tracer()
+        tracer.event(guild_id, "play_next.track", title=track.title, offset=offset)
+        state.current_track = track
+        state.start_time = datetime.now() - timedelta(seconds=offset)
+        state._is_playing = True
+
+        # 미리 준비된 소스가 있는지 확인 (schedule_prewarm)
+        prewarmed = track.source is not None and not refresh
+        if not prewarmed:
+            if track.source is not None:
+                track.source.cleanup()
+                track.source = None
+            # 로컬 오디오 캐시에 있으면 스트리밍 URL 없이 재생
+            local_path = get_audio_cache().lookup(track)
+
+            # 아직 추출되지 않았거나 URL이 곧 만료되면 재생 전에 추출
+            if not local_path and (refresh or stream_needs_refresh(track)):
+                tracer.event(guild_id, "play_next.resolve")
+                if not await self.resolve_track(state, track, refresh):
+                    raise RuntimeError(f"스트리밍 URL을 가져올 수 없습니다: {track.title}")
+
+            # 새로운 음원 생성 (최적화된 옵션 사용)
+            source = await self.create_source(track, local_path, offset)
+            tracer.event(guild_id, "play_next.source", local=bool(local_path), codec=track.codec)
+        else:
+            source = track.source
+            tracer.event(guild_id, "play_next.source", prewarmed=True)
+        # 소스는 한 번만 재생할 수 있으므로 트랙에서 분리
+        track.source = None
+        if state._prewarmed_track is track:
+            state._prewarmed_track = None
+
+        # 음성 클라이언트 상태 재확인
+        if not voice_client.is_connected():
+            logger.error("재생 시작 전 음성 클라이언트 연결 끊어짐")
+            source.cleanup()
+            state._is_playing = False
+            return False
+
+        state._play_token += 1
+        state._audio_started = False
+        token = state._play_token
+        events = state._events
+        loop = self.bot.loop
+        source = _FirstPacketSource(
+            source,
+            lambda: loop.call_soon_threadsafe(self._on_first_audio, state, token, prewarmed, time.monotonic())
+        )
+
+        def after_playing(error):
+            # 음성 스레드에서 호출되므로 종료 이벤트만 재생 작업의 큐에 넣음
+            event = PlayerEvent('finished', voice_client, token=token, error=error, ended_at=time.monotonic())
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        # 재생 시작
+        voice_client.play(source, after=after_playing)
+        get_audio_cache().record_play(track)
+        get_suggestions().record_track(guild_id, track)
+        tracer.event(guild_id, "play.started", prewarmed=prewarmed)
+        self.schedule_prefetch(guild_id)
+        self.schedule_prewarm(guild_id)
+        return True
 
     async def update_voice_state(self, guild_id: int, voice_client, text_channel=None):
         """서버의 음성 상태를 업데이트"""
         state = self.get_server_state(guild_id)
-        state.voice_client = voice_client
-        if text_channel:
-            state.text_channel = text_channel
+        state.set_voice(voice_client, text_channel)
 
 music_manager = None
 
@@ -366,4 +1091,13 @@ def get_music_manager(bot) -> MusicManager:
 async def setup(bot):
     """봇 설정에 필요한 초기화를 수행합니다."""
     music_manager = get_music_manager(bot)
-    bot.music_manager = music_manager
\ No newline at end of file
+    bot.music_manager = music_manager
+    music_manager.start_stream_refresher()
+    music_manager.start_state_sweeper()
+    if music_manager.restore_states():
+        bot.loop.create_task(music_manager.resume_restored_playback())
+    music_manager.start_persistence()
+
+async def teardown(bot):
+    """종료 시 서버 상태를 저장합니다."""
+    get_music_manager(bot).save_all()
\ No newline at end of file
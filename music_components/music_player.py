@@ -4,15 +4,22 @@ YouTube 다운로드와 오디오 처리를 담당합니다.
 """
 
 import discord
+from discord import app_commands
 from discord.ext import commands
-from yt_dlp import YoutubeDL
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Callable, Awaitable, Deque, List
 from datetime import datetime
 from config import settings, Track
 from .music_core import get_music_manager
 from .queue_manager import get_queue_manager
+from .track_cache import get_track_cache, is_playlist_url
+from .suggestions import get_suggestions
+from .extractor import Extractor, get_extractor
+from .tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +28,7 @@ class AudioPlayerError(Exception):
     pass
 
 class YTDLSource:
-    """YouTube 다운로더와 음원 처리를 담당하는 클래스"""
-    _cache: Dict[str, Any] = {}
-    _ytdl = YoutubeDL(settings.ytdl_options)
+    """YouTube 다운로더와 음원 처리를 담당하는 클래스 (추출은 Extractor가 담당)"""
 
     def __init__(self, source, *, data):
         self.source = source
@@ -36,35 +41,29 @@ class YTDLSource:
     @classmethod
     def _create_track(cls, data: dict) -> Track:
         """데이터 딕셔너리에서 Track 객체 생성"""
-        return Track(
-            title=data.get('title', 'Unknown'),
-            url=data.get('url', ''),
-            duration=int(data.get('duration', 0)),
-            webpage_url=data.get('webpage_url', ''),
-            thumbnail_url=data.get('thumbnail', None),
-            author=data.get('uploader', None)
-        )
+        return Extractor.create_track(data)
 
     @classmethod
     async def create_source(cls, query: str, *, loop=None, stream=True):
         """URL 또는 검색어로부터 음원 소스를 생성"""
         loop = loop or asyncio.get_event_loop()
         
-        # 캐시 확인
-        cache_key = query.lower().strip()
-        if cache_key in cls._cache:
-            cached_track = cls._cache[cache_key]
-            logger.info(f"캐시에서 트랙 로드: {cached_track.title}")
+        # 플레이리스트 URL은 영상 ID로 캐시를 조회하면 첫 곡만 반환되므로 캐시를 사용하지 않음
+        is_playlist = is_playlist_url(query)
+
+        # 캐시 확인 (디스크 캐시, 재시작 후에도 유지)
+        cache = get_track_cache()
+        cached_track = None if is_playlist else cache.get(query)
+        if cached_track:
+            get_tracer().event(None, "extract.cache_hit", title=cached_track.title)
             return cached_track
+        original_query = query
         
         try:
             # 검색어 처리
             is_search = not query.startswith(('http://', 'https://'))
             if is_search:
                 query = f"ytsearch1:{query}"
-
-            # 플레이리스트인지 확인
-            is_playlist = 'list=' in query and not is_search
             
             # 옵션 설정 (플레이리스트인 경우 extract_flat 사용)
             ytdl_opts = settings.ytdl_options.copy()
@@ -72,9 +71,7 @@ class YTDLSource:
                 ytdl_opts['extract_flat'] = 'in_playlist'
 
             # 타임아웃과 함께 음원 정보 추출
-            with YoutubeDL(ytdl_opts) as ydl:
-                data = await loop.run_in_executor(None, 
-                    lambda: ydl.extract_info(query, download=False))
+            data = await get_extractor().extract_info(query, loop=loop, options=ytdl_opts)
 
             if 'entries' in data:
                 entries = list(data['entries'])
@@ -91,9 +88,7 @@ class YTDLSource:
                         first_url = f"https://www.youtube.com/watch?v={first_entry['id']}"
                     
                     # 첫 번째 곡 상세 정보 추출
-                    with YoutubeDL(settings.ytdl_options) as ydl:
-                        first_data = await loop.run_in_executor(None, 
-                            lambda: ydl.extract_info(first_url, download=False))
+                    first_data = await get_extractor().extract_info(first_url, loop=loop)
                     
                     first_track = cls._create_track(first_data)
                     
@@ -106,14 +101,9 @@ class YTDLSource:
             # 단일 곡인 경우
             track = cls._create_track(data)
             
-            # 캐시에 저장 (source 없이)
-            cls._cache[cache_key] = track
-            
-            # 캐시 크기 제한 (메모리 누수 방지)
-            if len(cls._cache) > 100:
-                # 가장 오래된 항목 제거
-                oldest_key = next(iter(cls._cache))
-                del cls._cache[oldest_key]
+            # 캐시에 저장 (source 없이, 크기 제한과 LRU 제거는 캐시가 처리)
+            if not is_playlist:
+                cache.put(original_query, track)
             
             logger.info(f"트랙 생성 완료: {track.title}")
             return track
@@ -125,6 +115,136 @@ class YTDLSource:
             logger.error(f"음원 생성 중 오류: {e}")
             raise AudioPlayerError(f"음원 처리 실패: {str(e)}")
 
+@dataclass
+class PlaylistResult:
+    """플레이리스트 처리 결과"""
+    added_count: int = 0
+    failed_count: int = 0
+    cancelled: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """초당 처리한 곡 수"""
+        return (self.added_count + self.failed_count) / self.elapsed if self.elapsed else 0.0
+
+class PlaylistResolver:
+    """
+    플레이리스트 항목을 제한된 동시성으로 병렬 추출하는 클래스
+    추출은 병렬로 진행하되 대기열에는 플레이리스트 순서대로 추가합니다.
+    """
+
+    PROGRESS_INTERVAL = 25  # 진행 상황 로그 간격 (곡 수)
+    BATCH_SIZE = 100  # 대기열에 한 번에 추가할 최대 곡 수
+
+    def __init__(self, loop, workers: int, lazy: bool = False):
+        self.loop = loop
+        self.workers = max(1, workers)
+        self.lazy = lazy
+
+    async def _resolve_entry(self, entry: dict) -> Optional[Track]:
+        """항목 하나를 Track으로 변환 (캐시 우선, 지연 모드에서는 추출하지 않음)"""
+        unresolved = Extractor.create_unresolved_track(entry)
+        if unresolved is None:
+            return None
+        cache = get_track_cache()
+        track = cache.get(unresolved.webpage_url)
+        if track:
+            return track
+        if self.lazy:
+            # 재생 직전에 MusicManager의 prefetch가 추출
+            return unresolved
+        data = await get_extractor().extract_info(unresolved.webpage_url, loop=self.loop)
+        if not data:
+            return None
+        track = YTDLSource._create_track(data)
+        cache.put(None, track)
+        return track
+
+    async def resolve(self, entries: list, on_tracks: Callable[[List[Track]], Awaitable[int]],
+                      should_stop: Optional[Callable[[], bool]] = None) -> PlaylistResult:
+        """
+        항목들을 추출하여 순서대로 묶어서 on_tracks에 전달
+        이미 추출이 끝난 곡은 모아서(최대 BATCH_SIZE곡) 한 번에 전달하고, 다음 곡을 기다려야 하면 모은 곡을 먼저 전달합니다.
+        on_tracks는 받아들인 곡 수를 반환하며, 일부만 받아들이거나 ValueError를 던지면 남은 작업을 취소하고 중단합니다.
+        should_stop이 True를 반환하면 (/정지로 대기열 초기화 등) 새 추출을 시작하지 않고 모은 곡을 버린 뒤 바로 중단합니다.
+        """
+        result = PlaylistResult()
+        started = time.monotonic()
+        remaining = iter(entries)
+        total = len(entries)
+        pending: Deque[asyncio.Task] = deque()
+        batch: List[Track] = []
+
+        def stopped() -> bool:
+            return should_stop is not None and should_stop()
+
+        def fill():
+            while len(pending) < self.workers and not stopped():
+                entry = next(remaining, None)
+                if entry is None:
+                    return
+                pending.append(self.loop.create_task(self._resolve_entry(entry)))
+
+        async def deliver() -> bool:
+            tracks = batch[:]
+            batch.clear()
+            try:
+                accepted = await on_tracks(tracks)
+            except ValueError as e:
+                # 대기열 최대 크기 초과
+                logger.warning(f"플레이리스트 처리 중단: {e}")
+                accepted = 0
+            result.added_count += accepted
+            return accepted == len(tracks)
+
+        fill()
+        try:
+            while pending:
+                if stopped():
+                    result.cancelled = True
+                    break
+                if batch and not pending[0].done():
+                    # 캐시 적중/지연 모드는 한 번 양보하면 바로 끝나므로 기다려 본 뒤에 전달
+                    await asyncio.sleep(0)
+                if batch and (len(batch) >= self.BATCH_SIZE or not pending[0].done()):
+                    if not await deliver():
+                        result.cancelled = True
+                        break
+
+                task = pending.popleft()
+                try:
+                    track = await task
+                except Exception as e:
+                    logger.error(f"플레이리스트 곡 추가 실패: {e}")
+                    track = None
+                fill()
+
+                if track is None:
+                    result.failed_count += 1
+                    continue
+                batch.append(track)
+
+                done = result.added_count + len(batch) + result.failed_count
+                if done % self.PROGRESS_INTERVAL == 0:
+                    elapsed = time.monotonic() - started
+                    logger.info(f"플레이리스트 처리 중: {done}/{total}곡 ({done / elapsed:.1f}곡/초)")
+            else:
+                if stopped():
+                    result.cancelled = True
+                elif batch and not await deliver():
+                    result.cancelled = True
+        finally:
+            for task in pending:
+                task.cancel()
+
+        result.elapsed = time.monotonic() - started
+        logger.info(
+            f"플레이리스트 처리 완료: 추가 {result.added_count}, 실패 {result.failed_count}, "
+            f"{result.elapsed:.1f}초 ({result.throughput:.1f}곡/초, 워커 {self.workers}개)"
+        )
+        return result
+
 class MusicPlayer:
     """음악 재생과 관련된 모든 명령어를 관리하는 클래스"""
     
@@ -137,6 +257,7 @@ class MusicPlayer:
     # 슬래시 커맨드 핸들러들
     async def play(self, interaction: discord.Interaction, query: str):
         """슬래시 명령어 버전의 재생 명령어"""
+        requested_at = time.monotonic()
         try:
             # 사용자가 음성 채널에 있는지 확인
             if not interaction.user.voice:
@@ -177,30 +298,39 @@ class MusicPlayer:
             else:
                 track = result
                 is_playlist = False
+                # 다음 자동 완성에서 이 검색어로 같은 곡을 바로 찾을 수 있도록 색인
+                get_suggestions().record_track(guild_id, track, query)
 
             # 첫 번째 트랙 추가 및 재생
             if not voice_client.is_playing():
                 # 현재 재생 중이 아니므로 바로 재생
+                guild_state.requested_at = requested_at
                 await guild_state.add_track(track)
                 logger.info(f"트랙을 대기열에 추가: {track.title}")
                 
                 try:
-                    await self.music_manager.play_next_song(voice_client, guild_id)
-                    logger.info(f"play_next_song 함수 호출 완료: {track.title}")
+                    # 첫 오디오 패킷이 전송되거나 재생에 실패하면 바로 응답
+                    started = await asyncio.wait_for(
+                        self.music_manager.play_next_song(voice_client, guild_id),
+                        timeout=settings.play_start_timeout
+                    )
+                except asyncio.TimeoutError:
+                    started = None  # 요청은 재생 작업에 남아 있으므로 준비되면 재생됨
                 except Exception as e:
                     logger.error(f"play_next_song 함수 호출 실패: {e}")
                     await interaction.followup.send(f"재생 시작에 실패했습니다: {str(e)}")
                     return
-                
-                # 재생 상태 확인
-                await asyncio.sleep(3)
-                if voice_client.is_playing():
+
+                get_tracer().event(guild_id, "play.first_audio", seconds=time.monotonic() - requested_at, started=started)
+                if started:
                     msg = f"🎵 재생 시작: **{track.title}**"
-                    if is_playlist:
-                        msg += f"\n📜 플레이리스트의 나머지 {len(remaining_entries)}곡을 백그라운드에서 추가합니다..."
-                    await interaction.followup.send(msg)
+                elif started is None:
+                    msg = f"⏳ 재생을 준비하고 있습니다: **{track.title}**"
                 else:
-                    await interaction.followup.send(f"⚠️ 재생 시작에 실패했습니다: **{track.title}**")
+                    msg = f"⚠️ 재생 시작에 실패했습니다: **{track.title}**"
+                if started is not False and is_playlist:
+                    msg += f"\n📜 플레이리스트의 나머지 {len(remaining_entries)}곡을 백그라운드에서 추가합니다..."
+                await interaction.followup.send(msg)
             else:
                 # 현재 재생 중이므로 대기열에 추가
                 position = await self.queue_manager.add_track(guild_id, track)
@@ -224,44 +354,35 @@ class MusicPlayer:
 
     async def _process_playlist(self, interaction: discord.Interaction, guild_id: int, entries: list):
         """백그라운드에서 플레이리스트의 나머지 곡들을 처리"""
-        added_count = 0
-        failed_count = 0
-        
-        for entry in entries:
-            try:
-                # URL 추출
-                url = entry.get('url')
-                if not url:
-                    continue
-                    
-                if not url.startswith('http'):
-                    url = f"https://www.youtube.com/watch?v={url}"
+        state = self.music_manager.get_server_state(guild_id)
+        generation = state.queue_generation
+
+        async def add_batch(tracks: List[Track]) -> int:
+            # /정지 등으로 대기열이 초기화되었다면 중단
+            if state.queue_generation != generation:
+                return 0
+            # 대기열 제한을 넘는 부분은 잘라내고 추가 (일부만 추가되면 처리 중단)
+            positions = await self.queue_manager.add_tracks(guild_id, tracks, allow_partial=True)
+            return len(positions)
+
+        resolver = PlaylistResolver(
+            self.bot.loop,
+            settings.playlist_resolve_workers,
+            lazy=settings.lazy_track_resolve
+        )
+        result = await resolver.resolve(entries, add_batch, lambda: state.queue_generation != generation)
+        self.music_manager.schedule_prefetch(guild_id)
 
-                # 개별 곡 정보 추출 (빠른 처리를 위해 필요 정보만)
-                with YoutubeDL(settings.ytdl_options) as ydl:
-                    data = await self.bot.loop.run_in_executor(None, 
-                        lambda: ydl.extract_info(url, download=False))
-                
-                if not data:
-                    failed_count += 1
-                    continue
+        if result.cancelled and state.queue_generation != generation:
+            logger.info(f"플레이리스트 처리 중단 (대기열 초기화됨): {result.added_count}곡 추가됨")
+            return
 
-                track = YTDLSource._create_track(data)
-                await self.queue_manager.add_track(guild_id, track)
-                added_count += 1
-                
-                # 서버 부하 방지를 위한 약간의 딜레이
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"플레이리스트 곡 추가 실패: {e}")
-                failed_count += 1
-                continue
-        
         # 처리 완료 메시지
-        msg = f"✅ 플레이리스트 추가 완료: {added_count}곡 추가됨"
-        if failed_count > 0:
-            msg += f" ({failed_count}곡 실패/건너뜀)"
+        msg = f"✅ 플레이리스트 추가 완료: {result.added_count}곡 추가됨"
+        if result.failed_count > 0:
+            msg += f" ({result.failed_count}곡 실패/건너뜀)"
+        if result.cancelled:
+            msg += "\n⚠️ 대기열이 가득 차서 나머지 곡은 추가하지 못했습니다."
         
         try:
             await interaction.followup.send(msg, ephemeral=True)
@@ -324,13 +445,13 @@ class MusicPlayer:
             # 반복 모드 전환: none -> single -> all -> none
             current_mode = state._repeat_mode
             if current_mode == "none":
-                state._repeat_mode = "single"
+                state.set_repeat_mode("single")
                 await interaction.response.send_message("🔂 한곡 반복 모드가 설정되었습니다.")
             elif current_mode == "single":
-                state._repeat_mode = "all"
+                state.set_repeat_mode("all")
                 await interaction.response.send_message("🔁 전체 반복 모드가 설정되었습니다.")
             else:
-                state._repeat_mode = "none"
+                state.set_repeat_mode("none")
                 await interaction.response.send_message("➡️ 반복 모드가 해제되었습니다.")
 
         except Exception as e:
@@ -352,6 +473,7 @@ class MusicPlayer:
             if voice_client.is_playing():
                 voice_client.stop()
             await state.clear_queue()
+            state.mark_stopped()
             await voice_client.disconnect()
             await interaction.response.send_message("👋 재생을 멈추고 채널에서 나갔습니다.")
 
@@ -367,6 +489,14 @@ async def setup(bot):
     @bot.tree.command(name="재생", description="유튜브 URL 또는 검색어로 음악을 재생합니다.")
     async def play_slash_command(interaction: discord.Interaction, query: str):
         await player.play(interaction, query)
+
+    @play_slash_command.autocomplete('query')
+    async def play_query_autocomplete(interaction: discord.Interaction, current: str):
+        # 최근 재생한 곡 제목/검색어에서 제안 (선택하면 영상 URL이 전달되어 검색을 건너뜀)
+        return [
+            app_commands.Choice(name=name, value=value)
+            for name, value in get_suggestions().suggest(interaction.guild_id, current)
+        ]
     
     @bot.tree.command(name="다음곡", description="현재 곡을 건너뛰고 다음 곡을 재생합니다.")
     async def skip_slash_command(interaction: discord.Interaction):
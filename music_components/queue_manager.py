@@ -8,67 +8,37 @@ from discord.ext import commands
 import asyncio
 import random
 import logging
-from typing import Optional, List
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
-from .music_core import get_music_manager, Track
-
-logger = logging.getLogger(__name__)
-"""
-대기열 관리와 관련된 기능을 담당하는 모듈
-대기열 추가, 삭제, 이동 등의 기능을 제공합니다.
-"""
-
-import discord
-from discord.ext import commands
-import asyncio
-import random
-import logging
-from typing import Optional, List
-from datetime import datetime
+import weakref
+from typing import Iterable, Optional, List
 from concurrent.futures import ThreadPoolExecutor
+from config import settings
 from .music_core import get_music_manager, Track
+from .track_cache import track_to_dict
 
 logger = logging.getLogger(__name__)
 
 class QueueCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.queue_manager = QueueManager(bot)
+        self.queue_manager = get_queue_manager(bot)
 
     # 슬래시 커맨드
     async def show_queue(self, interaction: discord.Interaction):
-        """슬래시 명령어 버전의 대기열 보기"""
+        """슬래시 명령어 버전의 대기열 보기 (페이지 단위)"""
         try:
             guild_id = interaction.guild_id
-            queue_info = await self.queue_manager.get_queue_info(guild_id)
+            page = self.queue_manager.render_queue_page(guild_id, 0)
             
-            if not queue_info['current'] and not queue_info['queue']:
+            if page is None:
                 await interaction.response.send_message("🎵 대기열이 비어있습니다.")
                 return
 
-            embed = discord.Embed(title="🎵 현재 대기열", color=discord.Color.blue())
-            
-            if queue_info['current']:
-                current = queue_info['current']
-                embed.add_field(
-                    name="현재 재생 중",
-                    value=f"🎵 **{current.title}**\n⏱️ 길이: {current.duration//60}:{current.duration%60:02d}",
-                    inline=False
-                )
-
-            if queue_info['queue']:
-                queue_text = ""
-                for i, track in enumerate(queue_info['queue'], 1):
-                    queue_text += f"{i}. {track.title} ({track.duration//60}:{track.duration%60:02d})\n"
-                    if i >= 10:
-                        remaining = len(queue_info['queue']) - 10
-                        if remaining > 0:
-                            queue_text += f"\n...그 외 {remaining}곡"
-                        break
-                embed.add_field(name="대기열", value=queue_text, inline=False)
-            
-            await interaction.response.send_message(embed=embed)
+            embed, page_index, total_pages = page
+            if total_pages > 1:
+                view = QueuePageView(self.queue_manager, guild_id, page_index, total_pages)
+                await interaction.response.send_message(embed=embed, view=view)
+            else:
+                await interaction.response.send_message(embed=embed)
 
         except Exception as e:
             logger.error(f"대기열 표시 중 오류 발생: {e}")
@@ -113,52 +83,107 @@ class QueueCommands(commands.Cog):
                 ephemeral=True
             )
 
+class QueuePageView(discord.ui.View):
+    """대기열 화면의 이전/다음 페이지 버튼"""
+
+    def __init__(self, queue_manager: "QueueManager", guild_id: int, page: int, total_pages: int):
+        super().__init__(timeout=120)
+        self.queue_manager = queue_manager
+        self.guild_id = guild_id
+        self.page = page
+        self._sync_buttons(total_pages)
+
+    def _sync_buttons(self, total_pages: int):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= total_pages - 1
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        rendered = self.queue_manager.render_queue_page(self.guild_id, page)
+        if rendered is None:
+            await interaction.response.edit_message(content="🎵 대기열이 비어있습니다.", embed=None, view=None)
+            return
+        embed, self.page, total_pages = rendered
+        self._sync_buttons(total_pages)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+def _format_duration(seconds: int) -> str:
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
 class QueueManager:
+    PAGE_SIZE = 10  # 대기열 화면 한 페이지의 곡 수
+
     def __init__(self, bot):
         self.bot = bot
         self.music_manager = get_music_manager(bot)
         self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="queue_worker")
         self._lock = asyncio.Lock()
-        self._cache = {}
+        # 서버 상태별 렌더링된 대기열 페이지: {'key': (대기열 버전, 현재 곡), 'pages': {페이지: Embed}}
+        # 대기열/현재 곡의 지연 추출이 끝나면 MusicManager.resolve_track이 대기열 버전을 올려 다시 렌더링됨
+        # 유휴 서버 상태가 정리되면 해당 캐시도 함께 사라짐
+        self._page_cache = weakref.WeakKeyDictionary()
 
     async def add_track(self, guild_id: int, track: Track) -> int:
         """트랙을 대기열에 추가하고 위치를 반환"""
         state = self.music_manager.get_server_state(guild_id)
         async with self._lock:
-            if len(state.music_queue) >= 50:
-                raise ValueError("대기열이 가득 찼습니다 (최대 50곡)")
+            if len(state.music_queue) >= settings.max_queue_size:
+                raise ValueError(f"대기열이 가득 찼습니다 (최대 {settings.max_queue_size}곡)")
             
             position = len(state.music_queue)
             await state.add_track(track)
-            self._update_queue_cache(guild_id)
             return position + 1
 
-    def _update_queue_cache(self, guild_id: int):
-        """대기열 캐시 업데이트"""
+    async def add_tracks(self, guild_id: int, tracks: List[Track], allow_partial: bool = False) -> List[int]:
+        """
+        여러 트랙을 한 번에 대기열에 추가하고 추가된 위치 목록을 반환
+        대기열 제한은 묶음 전체에 적용되며, allow_partial이면 남은 자리만큼만 앞에서부터 추가합니다.
+        """
         state = self.music_manager.get_server_state(guild_id)
-        if len(state.music_queue) > 0:
-            self._cache[guild_id] = {
-                'last_updated': datetime.now(),
-                'queue': list(state.music_queue)
-            }
+        async with self._lock:
+            room = settings.max_queue_size - len(state.music_queue)
+            if len(tracks) > room:
+                if not allow_partial or room <= 0:
+                    raise ValueError(f"대기열이 가득 찼습니다 (최대 {settings.max_queue_size}곡)")
+                tracks = tracks[:room]
+
+            start = await state.add_tracks(tracks)
+            return list(range(start + 1, start + len(tracks) + 1))
 
     async def remove_track(self, guild_id: int, index: int) -> Optional[Track]:
         """대기열에서 특정 위치의 트랙을 제거"""
         state = self.music_manager.get_server_state(guild_id)
         async with self._lock:
             if 0 <= index < len(state.music_queue):
+                state.record('remove', index=index)
                 return state.music_queue.pop(index)
             return None
 
+    async def remove_tracks(self, guild_id: int, indices: Iterable[int]) -> List[Track]:
+        """대기열에서 여러 위치의 트랙을 한 번에 제거 (범위를 벗어난 위치는 무시)"""
+        state = self.music_manager.get_server_state(guild_id)
+        async with self._lock:
+            valid = sorted({index for index in indices if 0 <= index < len(state.music_queue)})
+            if not valid:
+                return []
+            state.record('remove_many', indices=valid)
+            return state.music_queue.pop_many(valid)
+
     async def move_track(self, guild_id: int, from_pos: int, to_pos: int) -> bool:
         """대기열에서 트랙의 위치를 이동"""
         state = self.music_manager.get_server_state(guild_id)
         async with self._lock:
             if (0 <= from_pos < len(state.music_queue) and 
                 0 <= to_pos < len(state.music_queue)):
-                track = state.music_queue[from_pos]
-                state.music_queue.remove(track)
-                state.music_queue.insert(to_pos, track)
+                state.music_queue.move(from_pos, to_pos)
+                state.record('move', from_pos=from_pos, to_pos=to_pos)
                 return True
             return False
 
@@ -169,17 +194,16 @@ class QueueManager:
             # 현재 재생 중인 곡 제외
             current = state.current_track
             
-            # 대기열을 리스트로 변환하여 섞기
-            queue_list = list(state.music_queue)
+            # 대기열 스냅샷을 리스트로 복사하여 섞기
+            queue_list = list(state.music_queue.snapshot())
             if len(queue_list) > 1:  # 2곡 이상일 때만 섞기
                 random.shuffle(queue_list)
                 
                 # 섞인 대기열 적용
                 state.music_queue.clear()
                 state.music_queue.extend(queue_list)
-                
-                # 캐시 갱신
-                self._update_queue_cache(guild_id)
+                if state.journaling:
+                    state.record('replace', tracks=[track_to_dict(track) for track in queue_list])
                 return True
             return False
 
@@ -189,10 +213,13 @@ class QueueManager:
         await state.clear_queue()
 
     async def get_queue_info(self, guild_id: int) -> dict:
-        """현재 대기열 정보를 가져옴"""
+        """
+        현재 대기열 정보를 가져옴
+        'queue'는 읽기 전용 스냅샷(tuple)으로, 대기열이 바뀌지 않았다면 이전 호출과 같은 객체를 공유합니다.
+        """
         state = self.music_manager.get_server_state(guild_id)
         current = state.current_track
-        queue = list(state.music_queue)
+        queue = state.music_queue.snapshot()
         return {
             'current': current,
             'queue': queue,
@@ -201,6 +228,50 @@ class QueueManager:
             'is_playing': state.is_playing
         }
 
+    def render_queue_page(self, guild_id: int, page: int):
+        """
+        대기열의 한 페이지를 Embed로 만들어 (embed, 페이지, 전체 페이지 수)를 반환
+        대기열 버전이 바뀌지 않았다면 캐시된 페이지를 그대로 사용합니다.
+        """
+        state = self.music_manager.get_server_state(guild_id)
+        queue = state.music_queue
+        current = state.current_track
+        if not current and not queue:
+            return None
+
+        total_pages = max(1, -(-len(queue) // self.PAGE_SIZE))
+        page = min(max(0, page), total_pages - 1)
+
+        key = (queue.version, id(current))
+        cached = self._page_cache.get(state)
+        if cached is None or cached['key'] != key:
+            cached = self._page_cache[state] = {'key': key, 'pages': {}}
+        embed = cached['pages'].get(page)
+        if embed is None:
+            embed = cached['pages'][page] = self._build_page_embed(state, page, total_pages)
+        return embed, page, total_pages
+
+    def _build_page_embed(self, state, page: int, total_pages: int) -> discord.Embed:
+        """해당 페이지의 곡만 읽어 Embed를 생성"""
+        embed = discord.Embed(title="🎵 현재 대기열", color=discord.Color.blue())
+        current = state.current_track
+        if current:
+            embed.add_field(
+                name="현재 재생 중",
+                value=f"🎵 **{current.title}**\n⏱️ 길이: {_format_duration(current.duration)}",
+                inline=False
+            )
+
+        start = page * self.PAGE_SIZE
+        lines = [
+            f"{start + i}. {track.title} ({_format_duration(track.duration)})"
+            for i, track in enumerate(state.music_queue.iter_from(start, self.PAGE_SIZE), 1)
+        ]
+        if lines:
+            embed.add_field(name="대기열", value="\n".join(lines), inline=False)
+        embed.set_footer(text=f"페이지 {page + 1}/{total_pages} · 총 {len(state.music_queue)}곡")
+        return embed
+
     def __del__(self):
         """리소스 정리"""
         self._executor.shutdown(wait=True)
@@ -0,0 +1,155 @@
+"""
+서버 음악 상태를 디스크에 보관하는 모듈
+대기열 변경을 저널(write-ahead log)에 기록하고 주기적으로 서버별 스냅샷으로 압축하여,
+재시작이나 장애 후에도 대기열과 재생 중이던 곡을 복원할 수 있게 합니다.
+유휴 상태로 메모리에서 제거된 서버도 같은 저장소에서 필요할 때 다시 불러옵니다.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 저널 항목: (연산 이름, 인자)
+JournalEntry = Tuple[str, dict]
+
+
+class StateStore:
+    """
+    SQLite 기반 서버 상태 저장소
+    서버당 스냅샷 한 행과 스냅샷 이후의 저널 항목을 유지합니다.
+    저널은 메모리 버퍼에 모았다가 flush()에서 한 트랜잭션으로 기록합니다.
+    """
+
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        # (guild_id, 연산 이름, JSON 인자) - 이벤트 루프에서만 추가/기록
+        self._pending: List[Tuple[int, str, str]] = []
+        if not enabled:
+            return
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS guild_states (
+                guild_id INTEGER PRIMARY KEY,
+                data TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS journal (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                args TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_journal_guild ON journal(guild_id, seq);
+        """)
+
+    def append(self, guild_id: int, op: str, args: dict):
+        """저널 항목을 버퍼에 추가 (flush 전까지는 디스크에 기록되지 않음)"""
+        if self._conn is not None:
+            self._pending.append((guild_id, op, json.dumps(args)))
+
+    def flush(self) -> int:
+        """버퍼의 저널 항목을 한 트랜잭션으로 기록하고 기록한 수를 반환"""
+        if self._conn is None or not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT INTO journal (guild_id, op, args) VALUES (?, ?, ?)", pending)
+        return len(pending)
+
+    def save(self, guild_id: int, data: dict):
+        """서버 스냅샷을 저장하고 그 이전의 저널 항목을 삭제 (압축)"""
+        if self._conn is None:
+            return
+        self.flush()
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO guild_states (guild_id, data, saved_at) VALUES (?, ?, ?)",
+                (guild_id, json.dumps(data), time.time())
+            )
+            self._conn.execute("DELETE FROM journal WHERE guild_id = ?", (guild_id,))
+
+    def load(self, guild_id: int) -> Tuple[Optional[dict], List[JournalEntry]]:
+        """서버의 스냅샷과 그 이후 저널 항목을 읽음"""
+        if self._conn is None:
+            return None, []
+        self.flush()
+        row = self._conn.execute(
+            "SELECT data FROM guild_states WHERE guild_id = ?", (guild_id,)
+        ).fetchone()
+        entries = [
+            (op, json.loads(args)) for op, args in self._conn.execute(
+                "SELECT op, args FROM journal WHERE guild_id = ? ORDER BY seq", (guild_id,)
+            )
+        ]
+        return (json.loads(row[0]) if row else None), entries
+
+    def load_all(self) -> Dict[int, Tuple[Optional[dict], List[JournalEntry]]]:
+        """모든 서버의 스냅샷과 저널을 한 번에 읽음 (시작 시 복원용)"""
+        if self._conn is None:
+            return {}
+        self.flush()
+        states: Dict[int, Tuple[Optional[dict], List[JournalEntry]]] = {}
+        for guild_id, data in self._conn.execute("SELECT guild_id, data FROM guild_states"):
+            try:
+                states[guild_id] = (json.loads(data), [])
+            except ValueError as e:
+                logger.error(f"저장된 서버 상태를 읽을 수 없습니다 (서버 {guild_id}): {e}")
+        journals = defaultdict(list)
+        for guild_id, op, args in self._conn.execute("SELECT guild_id, op, args FROM journal ORDER BY seq"):
+            journals[guild_id].append((op, json.loads(args)))
+        for guild_id, entries in journals.items():
+            snapshot, _ = states.get(guild_id, (None, None))
+            states[guild_id] = (snapshot, entries)
+        return states
+
+    def delete(self, guild_id: int):
+        """서버의 스냅샷과 저널을 삭제"""
+        if self._conn is None:
+            return
+        self.flush()
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM guild_states WHERE guild_id = ?", (guild_id,))
+            self._conn.execute("DELETE FROM journal WHERE guild_id = ?", (guild_id,))
+
+    def __len__(self) -> int:
+        if self._conn is None:
+            return 0
+        return self._conn.execute("SELECT COUNT(*) FROM guild_states").fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+state_store = None
+
+def get_state_store() -> StateStore:
+    """StateStore 인스턴스를 가져오거나 생성"""
+    global state_store
+    if state_store is None:
+        state_store = StateStore(settings.state_store_path, enabled=settings.state_store_enabled)
+    return state_store
+
+async def setup(bot):
+    """봇 시작 시 서버 상태 저장소를 열어둡니다."""
+    bot.state_store = get_state_store()
+    if bot.state_store.enabled:
+        logger.info(f"서버 상태 저장소 로드 완료: {len(bot.state_store)}개 서버")
@@ -0,0 +1,194 @@
+"""
+/재생 자동 완성 모듈
+최근 재생한 곡 제목과 검색어를 서버별/전체 접두사 색인에 보관하고,
+입력 중인 검색어에 맞는 곡을 영상 URL로 제안하여 선택 시 검색(ytsearch) 없이 캐시에서 바로 찾게 합니다.
+"""
+
+import heapq
+import logging
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from config import Track, settings
+from .track_cache import extract_video_id, get_track_cache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+MAX_CHOICES = 25  # Discord 자동 완성 선택지 최대 개수
+MAX_CHOICE_LENGTH = 100  # 선택지 이름/값 최대 길이
+_MAX_WORD_KEYS = 8  # 항목당 색인할 단어 시작 위치 수 (접두사 범위는 최대 capacity * 이 값)
+
+
+def _word_keys(text: str) -> List[str]:
+    """정규화된 문자열의 각 단어 시작 위치부터의 문자열 (중간 단어로도 찾을 수 있게)"""
+    keys = [text]
+    for i, char in enumerate(text):
+        if len(keys) >= _MAX_WORD_KEYS:
+            break
+        if char == ' ' and i + 1 < len(text):
+            keys.append(text[i + 1:])
+    return keys
+
+
+class Suggestion:
+    """색인 항목: 연결된 영상의 ID와 선택지에 표시할 곡 제목"""
+
+    __slots__ = ('title', 'video_id', 'uses', 'last_used')
+
+    def __init__(self, title: str, video_id: str, now: float):
+        self.title = title
+        self.video_id = video_id
+        self.uses = 1
+        self.last_used = now
+
+
+class PrefixIndex:
+    """
+    정렬된 배열 기반 접두사 색인
+    (검색 키, 항목) 쌍을 정렬해 두고 bisect로 접두사 범위를 찾습니다.
+    항목 수가 capacity를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._keys: List[Tuple[str, str]] = []
+        self._entries: "OrderedDict[str, Suggestion]" = OrderedDict()  # 정규화된 문구 -> 항목 (최근 사용 순)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, label: str, video_id: str, title: Optional[str] = None, now: Optional[float] = None):
+        """문구(곡 제목 또는 검색어)를 영상 ID와 함께 색인 (이미 있으면 사용 횟수와 시각만 갱신)"""
+        text = normalize_query(label)
+        if not text:
+            return
+        now = time.monotonic() if now is None else now
+        title = (title or label).strip()[:MAX_CHOICE_LENGTH]
+        entry = self._entries.get(text)
+        if entry is not None:
+            entry.uses += 1
+            entry.last_used = now
+            entry.video_id = video_id
+            entry.title = title
+            self._entries.move_to_end(text)
+            return
+
+        while len(self._entries) >= self.capacity and self._entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._unindex(oldest)
+        self._entries[text] = Suggestion(title, video_id, now)
+        for key in _word_keys(text):
+            insort(self._keys, (key, text))
+
+    def _unindex(self, text: str):
+        for key in _word_keys(text):
+            i = bisect_left(self._keys, (key, text))
+            if i < len(self._keys) and self._keys[i] == (key, text):
+                del self._keys[i]
+
+    def search(self, prefix: str, limit: int = MAX_CHOICES) -> List[Suggestion]:
+        """접두사로 시작하는 단어가 있는 항목을 자주/최근 사용한 순으로 반환 (빈 입력이면 최근 항목)"""
+        prefix = normalize_query(prefix)
+        if not prefix:
+            recent = []
+            for text in reversed(self._entries):
+                recent.append(self._entries[text])
+                if len(recent) >= limit:
+                    break
+            return recent
+
+        # 사전순 앞쪽 일부만 보면 자주 쓰는 항목을 놓치므로 접두사 범위 전체에서 순위를 매김
+        start = bisect_left(self._keys, (prefix,))
+        end = bisect_left(self._keys, (prefix + '\U0010ffff',), start)
+        texts = {text for _, text in self._keys[start:end]}
+        return heapq.nlargest(
+            limit,
+            (self._entries[text] for text in texts),
+            key=lambda entry: (entry.uses, entry.last_used)
+        )
+
+
+class SuggestionService:
+    """서버별 색인과 전체 색인을 관리하고 자동 완성 선택지를 만듦"""
+
+    def __init__(self, global_entries: int, guild_entries: int, max_guilds: int):
+        self.guild_entries = guild_entries
+        self.max_guilds = max_guilds
+        self.global_index = PrefixIndex(global_entries)
+        self._guild_indexes: "OrderedDict[int, PrefixIndex]" = OrderedDict()
+
+    def _guild_index(self, guild_id: int, create: bool = False) -> Optional[PrefixIndex]:
+        index = self._guild_indexes.get(guild_id)
+        if index is not None:
+            self._guild_indexes.move_to_end(guild_id)
+        elif create:
+            index = self._guild_indexes[guild_id] = PrefixIndex(self.guild_entries)
+            if len(self._guild_indexes) > self.max_guilds:
+                self._guild_indexes.popitem(last=False)
+        return index
+
+    def record_track(self, guild_id: Optional[int], track: Track, query: Optional[str] = None):
+        """재생/요청한 곡의 제목과 (URL이 아닌) 검색어를 색인"""
+        video_id = track.video_id or extract_video_id(track.webpage_url)
+        if not video_id:
+            return
+        labels = [track.title]
+        if query and not query.startswith(('http://', 'https://')):
+            labels.append(query)
+        now = time.monotonic()
+        guild_index = self._guild_index(guild_id, create=True) if guild_id is not None else None
+        for label in labels:
+            self.global_index.add(label, video_id, track.title, now)
+            if guild_index is not None:
+                guild_index.add(label, video_id, track.title, now)
+
+    def suggest(self, guild_id: Optional[int], current: str, limit: int = MAX_CHOICES) -> List[Tuple[str, str]]:
+        """
+        입력 중인 검색어에 대한 (표시 이름, 값) 목록
+        서버 색인 결과를 먼저, 전체 색인 결과를 뒤에 두며 같은 영상은 한 번만 제안합니다.
+        값은 영상 URL이므로 선택하면 트랙 캐시에서 바로 찾고, 캐시가 만료되어도 검색 없이 추출합니다.
+        """
+        guild_index = self._guild_index(guild_id) if guild_id is not None else None
+        sources = ([guild_index] if guild_index is not None else []) + [self.global_index]
+        choices, seen = [], set()
+        for index in sources:
+            for entry in index.search(current, limit):
+                if entry.video_id in seen:
+                    continue
+                seen.add(entry.video_id)
+                choices.append((entry.title, f"https://www.youtube.com/watch?v={entry.video_id}"))
+                if len(choices) >= limit:
+                    return choices
+        return choices
+
+    def load_from_cache(self, limit: int) -> int:
+        """트랙 캐시의 최근 항목으로 전체 색인을 채우고 색인한 트랙 수를 반환 (재시작 직후용)"""
+        loaded = 0
+        # 오래된 항목부터 넣어야 최근 항목이 색인의 최근 사용 순서 뒤쪽에 남음
+        for track, queries in reversed(get_track_cache().recent(limit)):
+            video_id = track.video_id or extract_video_id(track.webpage_url)
+            if not video_id:
+                continue
+            for label in [track.title, *queries]:
+                self.global_index.add(label, video_id, track.title)
+            loaded += 1
+        return loaded
+
+suggestion_service = None
+
+def get_suggestions() -> SuggestionService:
+    """SuggestionService 인스턴스를 가져오거나 생성"""
+    global suggestion_service
+    if suggestion_service is None:
+        suggestion_service = SuggestionService(
+            settings.autocomplete_global_entries,
+            settings.autocomplete_guild_entries,
+            settings.autocomplete_max_guilds
+        )
+    return suggestion_service
+
+async def setup(bot):
+    """봇 시작 시 트랙 캐시로 자동 완성 색인을 채웁니다."""
+    loaded = get_suggestions().load_from_cache(settings.autocomplete_global_entries)
+    logger.info(f"자동 완성 색인 로드 완료: {loaded}곡")
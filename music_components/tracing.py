@@ -0,0 +1,91 @@
+"""
+재생 경로의 이벤트를 가볍게 기록하는 추적 모듈
+이벤트는 링 버퍼에 원본 값 그대로 저장되고, 문자열 변환은 출력(샘플링/덤프) 시에만 수행됩니다.
+"""
+
+import itertools
+import logging
+import random
+import signal
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """
+    서버별 correlation ID를 붙여 이벤트를 기록하는 클래스
+    sample_rate 비율의 이벤트만 DEBUG 로그로 내보내고, 전체 이벤트는 링 버퍼에 보관합니다.
+    """
+
+    def __init__(self, buffer_size: int, sample_rate: float):
+        self.sample_rate = sample_rate
+        # (시각, guild_id, correlation ID, 이벤트 이름, 필드)
+        self._buffer: Deque[Tuple[float, Optional[int], str, str, Dict]] = deque(maxlen=buffer_size)
+        self._correlations: Dict[Optional[int], str] = {}
+        self._counter = itertools.count(1)
+
+    def new_correlation(self, guild_id: Optional[int]) -> str:
+        """서버의 새 작업 흐름(재생 요청, 곡 전환 등)에 사용할 correlation ID를 발급"""
+        correlation_id = f"{next(self._counter):x}"
+        self._correlations[guild_id] = correlation_id
+        return correlation_id
+
+    def forget(self, guild_id: Optional[int]):
+        """서버의 correlation ID를 정리"""
+        self._correlations.pop(guild_id, None)
+
+    def event(self, guild_id: Optional[int], name: str, **fields):
+        """이벤트를 기록 (포맷팅 없이 값만 저장)"""
+        correlation_id = self._correlations.get(guild_id, "-")
+        self._buffer.append((time.time(), guild_id, correlation_id, name, fields))
+        if self.sample_rate > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < self.sample_rate:
+            logger.debug("[%s:%s] %s %s", guild_id, correlation_id, name, _LazyFields(fields))
+
+    def dump(self, guild_id: Optional[int] = None) -> List[str]:
+        """링 버퍼의 이벤트를 문자열로 변환 (guild_id를 지정하면 해당 서버만)"""
+        lines = []
+        for timestamp, event_guild, correlation_id, name, fields in list(self._buffer):
+            if guild_id is not None and event_guild != guild_id:
+                continue
+            stamp = time.strftime('%H:%M:%S', time.localtime(timestamp)) + f".{int(timestamp * 1000) % 1000:03d}"
+            lines.append(f"{stamp} [{event_guild}:{correlation_id}] {name} {_LazyFields(fields)}")
+        return lines
+
+    def dump_to_file(self, path: Optional[str] = None) -> str:
+        """링 버퍼 내용을 파일로 저장하고 경로를 반환"""
+        path = path or settings.trace_dump_path
+        lines = self.dump()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        logger.warning(f"추적 버퍼 {len(lines)}건을 저장했습니다: {path}")
+        return path
+
+
+class _LazyFields:
+    """로그가 실제로 출력될 때만 필드를 문자열로 변환"""
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields: Dict):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{key}={value}" for key, value in self.fields.items())
+
+tracer = Tracer(settings.trace_buffer_size, settings.trace_sample_rate)
+
+def get_tracer() -> Tracer:
+    """전역 Tracer를 반환"""
+    return tracer
+
+async def setup(bot):
+    """SIGUSR1 신호를 받으면 추적 버퍼를 파일로 저장하도록 등록합니다."""
+    try:
+        bot.loop.add_signal_handler(signal.SIGUSR1, tracer.dump_to_file)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        # Windows 등 신호 처리를 지원하지 않는 환경
+        logger.info("SIGUSR1 추적 덤프를 지원하지 않는 환경입니다.")
@@ -0,0 +1,244 @@
+"""
+트랙 메타데이터를 디스크에 영구 저장하는 캐시 모듈
+검색어/영상 ID로 Track 정보와 스트리밍 URL을 저장하여
+재시작 직후에도 extract_info 호출을 건너뛸 수 있게 합니다.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from dataclasses import fields
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from config import Track, settings
+
+logger = logging.getLogger(__name__)
+
+_YOUTUBE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+# source 같은 런타임 객체는 저장하지 않음
+_TRACK_FIELDS = tuple(f.name for f in fields(Track) if f.name != 'source')
+
+
+def track_to_dict(track: Track) -> dict:
+    """트랙을 JSON으로 저장할 수 있는 딕셔너리로 변환 (source 제외)"""
+    return {name: getattr(track, name) for name in _TRACK_FIELDS}
+
+
+def track_from_dict(data: dict) -> Track:
+    """track_to_dict로 저장한 딕셔너리에서 트랙을 복원"""
+    return Track(**{name: data[name] for name in _TRACK_FIELDS if name in data})
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키로 사용할 수 있도록 검색어를 정규화"""
+    return " ".join(query.lower().split())
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """YouTube URL에서 영상 ID를 추출 (youtu.be, watch?v=, shorts 지원)"""
+    if not url or not url.startswith(('http://', 'https://')):
+        return None
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    video_id = None
+    if host.endswith('youtu.be'):
+        video_id = parsed.path.lstrip('/').split('/')[0]
+    elif host.endswith('youtube.com'):
+        if parsed.path == '/watch':
+            video_id = parse_qs(parsed.query).get('v', [None])[0]
+        elif parsed.path.startswith(('/shorts/', '/embed/', '/live/')):
+            video_id = parsed.path.split('/')[2]
+    if video_id and _YOUTUBE_ID_PATTERN.match(video_id):
+        return video_id
+    return None
+
+
+def is_playlist_url(query: str) -> bool:
+    """플레이리스트(list= 파라미터)가 포함된 URL인지 확인 (watch?v=...&list=... 포함)"""
+    if not query or not query.startswith(('http://', 'https://')):
+        return False
+    return 'list' in parse_qs(urlparse(query).query)
+
+
+def track_key(track: Track) -> str:
+    """트랙을 식별하는 키 (영상 ID 우선)"""
+    return track.video_id or extract_video_id(track.webpage_url) or track.webpage_url
+
+
+class TrackCache:
+    """
+    SQLite 기반 트랙 캐시
+    항목별 만료 시간(TTL)과 최근 사용 시각 기준 LRU 제거를 지원합니다.
+    다른 프로세스가 파일을 잠그고 있어 busy_timeout 안에 접근하지 못하면 조회는 캐시 미스, 저장은 생략으로 처리합니다.
+    """
+
+    def __init__(self, path: str, max_entries: int, default_ttl: int, busy_timeout: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock_failures = 0
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tracks (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS queries (
+                query TEXT PRIMARY KEY,
+                key TEXT NOT NULL REFERENCES tracks(key) ON DELETE CASCADE
+            );
+            CREATE INDEX IF NOT EXISTS idx_tracks_last_access ON tracks(last_access);
+            CREATE INDEX IF NOT EXISTS idx_queries_key ON queries(key);
+        """)
+
+    def _locked(self, action: str, error: sqlite3.OperationalError):
+        """잠금 대기 시간 초과 등으로 캐시 작업을 건너뜀"""
+        self.lock_failures += 1
+        logger.debug("트랙 캐시 %s 생략: %s", action, error)
+
+    def _lookup_key(self, query: str) -> Optional[str]:
+        """검색어 또는 URL을 트랙 키로 변환"""
+        video_id = extract_video_id(query)
+        if video_id:
+            return video_id
+        try:
+            row = self._conn.execute(
+                "SELECT key FROM queries WHERE query = ?", (normalize_query(query),)
+            ).fetchone()
+        except sqlite3.OperationalError as e:
+            self._locked("조회", e)
+            return None
+        return row[0] if row else None
+
+    def get(self, query: str) -> Optional[Track]:
+        """캐시에서 트랙을 조회 (만료된 항목은 제거 후 None 반환)"""
+        key = self._lookup_key(query)
+        if key is None:
+            self.misses += 1
+            return None
+        return self.get_by_key(key)
+
+    def get_by_key(self, key: str) -> Optional[Track]:
+        """트랙 키(영상 ID)로 캐시를 조회"""
+        now = time.time()
+        try:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM tracks WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM tracks WHERE key = ?", (key,))
+                row = None
+        except sqlite3.OperationalError as e:
+            self._locked("조회", e)
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+
+        data, _ = row
+        try:
+            self._conn.execute("UPDATE tracks SET last_access = ? WHERE key = ?", (now, key))
+        except sqlite3.OperationalError as e:
+            # 최근 사용 시각 갱신만 실패한 것이므로 조회 결과는 그대로 사용
+            self._locked("사용 시각 갱신", e)
+        self.hits += 1
+        return track_from_dict(json.loads(data))
+
+    def put(self, query: Optional[str], track: Track, ttl: Optional[int] = None):
+        """트랙을 캐시에 저장하고 검색어를 트랙 키에 연결"""
+        now = time.time()
+        key = track_key(track)
+        if not key:
+            return
+        data = json.dumps(track_to_dict(track))
+        expires_at = now + (ttl if ttl is not None else self.default_ttl)
+        if track.expires_at:
+            # 스트리밍 URL이 만료되기 전에 캐시 항목도 만료되도록 제한
+            expires_at = min(expires_at, track.expires_at - settings.stream_refresh_margin)
+
+        try:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "INSERT INTO tracks (key, data, expires_at, last_access) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET data = excluded.data, "
+                    "expires_at = excluded.expires_at, last_access = excluded.last_access",
+                    (key, data, expires_at, now)
+                )
+                if query and not extract_video_id(query):
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO queries (query, key) VALUES (?, ?)",
+                        (normalize_query(query), key)
+                    )
+                self._evict()
+        except sqlite3.OperationalError as e:
+            self._locked("저장", e)
+
+    def _evict(self):
+        """만료된 항목과 크기 제한을 넘는 가장 오래 사용되지 않은 항목을 제거"""
+        self._conn.execute("DELETE FROM tracks WHERE expires_at <= ?", (time.time(),))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM tracks WHERE key IN "
+                "(SELECT key FROM tracks ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def recent(self, limit: int) -> List[Tuple[Track, List[str]]]:
+        """최근 사용한 순서대로 트랙과 연결된 검색어 목록을 반환 (자동 완성 색인 초기화용)"""
+        rows = self._conn.execute(
+            "SELECT key, data FROM tracks WHERE expires_at > ? ORDER BY last_access DESC LIMIT ?",
+            (time.time(), limit)
+        ).fetchall()
+        queries = {key: [] for key, _ in rows}
+        for query, key in self._conn.execute("SELECT query, key FROM queries"):
+            if key in queries:
+                queries[key].append(query)
+        return [(track_from_dict(json.loads(data)), queries[key]) for key, data in rows]
+
+    def invalidate(self, key: str):
+        """특정 트랙 항목을 캐시에서 제거"""
+        try:
+            self._conn.execute("DELETE FROM tracks WHERE key = ?", (key,))
+        except sqlite3.OperationalError as e:
+            self._locked("삭제", e)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+track_cache = None
+
+def get_track_cache() -> TrackCache:
+    """TrackCache 인스턴스를 가져오거나 생성"""
+    global track_cache
+    if track_cache is None:
+        track_cache = TrackCache(
+            settings.track_cache_path,
+            settings.track_cache_max_entries,
+            settings.track_cache_ttl,
+            busy_timeout=settings.track_cache_busy_timeout
+        )
+    return track_cache
+
+async def setup(bot):
+    """봇 시작 시 트랙 캐시를 열어둡니다."""
+    bot.track_cache = get_track_cache()
+    logger.info(f"트랙 캐시 로드 완료: {len(bot.track_cache)}개 항목")